@@ -1,11 +1,11 @@
 import nltk
 from collections import defaultdict
 from typing import List, Set, Union, Dict
-import pymorphy2
 import spacy
 from spacy.tokens.token import Token
 from spacy.tokens.doc import Doc
 
+from utils.morphology import morph
 from predictor import Predictor
 
 nltk.download('punkt')
@@ -33,7 +33,7 @@ class AspectExtractor:
         self._predictor = Predictor()
         if self.do_normalize:
             self._syntax_parser = spacy.load("ru_core_news_lg")
-            self._morph = pymorphy2.MorphAnalyzer()
+            self._morph = morph
 
     def __get_noun_grammemes(self, token: Token) -> Set[str]:
         """
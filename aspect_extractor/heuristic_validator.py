@@ -1,12 +1,13 @@
 from typing import List, Tuple
-import pymorphy2
 from pymorphy2.analyzer import Parse
 
+from utils.morphology import morph
+
 
 class HeuristicValidator:
 
     def __init__(self):
-        self._morph = pymorphy2.MorphAnalyzer()
+        self._morph = morph
 
         self._isaspect = lambda label: label != 'O'
         self._isnested = lambda label: '|' in label
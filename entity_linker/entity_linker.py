@@ -1,14 +1,28 @@
+import os
+
+from utils.paths import WIKIDATA_NAME_INDEX_PATH
 from entity_linker.entity_linking_pipeline.entity_linking_pipeline import EntityLinkingPipeline
 from entity_linker.entity_linking_pipeline.query_creator.n_gram_query_creator import NGramQueryCreator
 from entity_linker.entity_linking_pipeline.candidates_generator.string_match_candidates_generator import StringMatchCandidatesGenerator
-from entity_linker.entity_linking_pipeline.candidates_ranger import CosineSimRangerWeights
+from entity_linker.entity_linking_pipeline.candidates_generator.index_candidates_generator import IndexCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_ranger import CosineSimRangerWeights, EmbeddingMatrixRanger
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_matrix_ranger import is_embedding_matrix_valid
 
 class RussianEntityLinker(EntityLinkingPipeline):
 
     def __init__(self):
+        # если индекс названий построен, кандидаты ищутся по нему, иначе - просмотром дампа
+        # если по текущей сборке индекса посчитана матрица векторов сущностей, кандидаты ранжируются по ней
+        candidates_ranger = CosineSimRangerWeights()
+        if os.path.exists(WIKIDATA_NAME_INDEX_PATH):
+            candidates_generator = IndexCandidatesGenerator()
+            if is_embedding_matrix_valid():
+                candidates_ranger = EmbeddingMatrixRanger()
+        else:
+            candidates_generator = StringMatchCandidatesGenerator()
         super().__init__(
             query_creator=NGramQueryCreator(),
-            candidates_generator=StringMatchCandidatesGenerator(),
-            candidates_ranger=CosineSimRangerWeights()
+            candidates_generator=candidates_generator,
+            candidates_ranger=candidates_ranger
         )
 
@@ -1,4 +1,6 @@
 from entity_linker.entity_linking_pipeline.candidates_generator.base_candidates_generator import BaseCandidatesGenerator
 from entity_linker.entity_linking_pipeline.candidates_generator.string_match_candidates_generator import StringMatchCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_generator.index_candidates_generator import IndexCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_generator.fuzzy_candidates_generator import FuzzyCandidatesGenerator
 
-__all__ = [BaseCandidatesGenerator, StringMatchCandidatesGenerator]
+__all__ = [BaseCandidatesGenerator, StringMatchCandidatesGenerator, IndexCandidatesGenerator, FuzzyCandidatesGenerator]
@@ -1,4 +1,4 @@
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Set, Any, Tuple
 from utils.paths import WIKIDATA_DUMP_PATH
 
 
@@ -18,3 +18,10 @@ class BaseCandidatesGenerator:
         """
         raise NotImplementedError
 
+    def create_candidates_batch(self, terms_with_queries: List[Tuple[str, Set[str]]]) -> List[List[Dict[str, Any]]]:
+        """ Создание множеств кандидатов для нескольких терминов
+
+        :param terms_with_queries: список пар (термин, набор запросов)
+        :return: список кандидатов для каждого термина
+        """
+        return [self.create_candidates_set(normalized_term, queries) for normalized_term, queries in terms_with_queries]
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Optional, Set
+
+from utils.paths import WIKIDATA_NAME_INDEX_PATH
+from entity_linker.entity_linking_pipeline.candidates_generator.base_candidates_generator import BaseCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex
+from entity_linker.entity_linking_pipeline.candidates_generator.trigram_index import TrigramIndex
+
+
+class FuzzyCandidatesGenerator(BaseCandidatesGenerator):
+    """ Генерация кандидатов по нечёткому совпадению термина с названиями сущностей (см. trigram_index). Находит
+    сущности для терминов с другими словоформами или опечатками
+    """
+
+    def __init__(self, index_path: str = WIKIDATA_NAME_INDEX_PATH, top_k: int = 10, min_similarity: float = 0.5,
+                 exact_generator: Optional[BaseCandidatesGenerator] = None):
+        """
+        :param index_path: Путь к индексу названий с триграммным индексом
+        :param top_k: Количество самых похожих названий, по которым ищутся сущности
+        :param min_similarity: Минимальный коэффициент Жаккара триграмм термина и названия
+        :param exact_generator: Генератор точных совпадений, кандидаты которого идут перед нечёткими
+        (None - только нечёткий поиск)
+        """
+        super().__init__()
+        self._name_index = NameIndex(index_path)
+        self._trigram_index = TrigramIndex(index_path)
+        self._top_k = top_k
+        self._min_similarity = min_similarity
+        self._exact_generator = exact_generator
+
+    def create_candidates_set(self, normalized_term: str, queries: Set[str]) -> List[Dict[str, Any]]:
+        similar_names = self._trigram_index.search(normalized_term, self._top_k, self._min_similarity)
+        fuzzy_candidates = self._name_index.lookup({name for name, _ in similar_names})
+        if self._exact_generator is None:
+            return fuzzy_candidates
+        candidates = self._exact_generator.create_candidates_set(normalized_term, queries)
+        ids = {candidate['id'] for candidate in candidates}
+        return candidates + [candidate for candidate in fuzzy_candidates if candidate['id'] not in ids]
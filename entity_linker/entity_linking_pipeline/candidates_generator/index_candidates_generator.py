@@ -0,0 +1,18 @@
+from typing import Any, Dict, List, Set
+
+from utils.paths import WIKIDATA_NAME_INDEX_PATH
+from entity_linker.entity_linking_pipeline.candidates_generator.base_candidates_generator import BaseCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex
+
+
+class IndexCandidatesGenerator(BaseCandidatesGenerator):
+    """ Генерация кандидатов по построковому совпадению с помощью индекса названий (см. name_index). Возвращает те
+    же кандидаты, что и StringMatchCandidatesGenerator, но без просмотра дампа
+    """
+
+    def __init__(self, index_path: str = WIKIDATA_NAME_INDEX_PATH):
+        super().__init__()
+        self._name_index = NameIndex(index_path)
+
+    def create_candidates_set(self, normalized_term: str, queries: Set[str]) -> List[Dict[str, Any]]:
+        return self._name_index.lookup({normalized_term} | set(queries))
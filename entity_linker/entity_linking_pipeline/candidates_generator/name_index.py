@@ -0,0 +1,119 @@
+""" Инвертированный индекс названий сущностей Wikidata для генерации кандидатов без просмотра всего дампа.
+
+Индекс - база SQLite с таблицами entities (запись о сущности: идентификатор, смещение строки в дампе, описание,
+названия), names (название в нижнем регистре -> номер записи) и metadata (идентификатор сборки и количество
+сущностей, по ним к индексу привязываются построенные по нему данные). Индекс строится один раз командой
+
+    python -m entity_linker.entity_linking_pipeline.candidates_generator.name_index
+"""
+import os
+import sqlite3
+import uuid
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import orjson
+
+from utils.paths import WIKIDATA_DUMP_PATH, WIKIDATA_NAME_INDEX_PATH
+from entity_linker.entity_linking_pipeline.dump_scanner import scan_dump
+
+# ограничение SQLite на количество параметров одного запроса (в старых версиях - 999)
+MAX_QUERY_PARAMS = 900
+
+
+def build_name_index(dump_path: str = WIKIDATA_DUMP_PATH, index_path: str = WIKIDATA_NAME_INDEX_PATH,
+                     n_workers: int = 1) -> int:
+    """ Строит индекс названий по дампу. Индекс записывается во временный файл, который затем заменяет старый
+
+    :param dump_path: Путь к дампу
+    :param index_path: Путь к файлу индекса
+    :param n_workers: Количество процессов, разбирающих дамп (см. dump_scanner)
+    :return: Количество сущностей в индексе
+    """
+    tmp_path = f'{index_path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute(
+            'CREATE TABLE entities (row INTEGER PRIMARY KEY, id TEXT, offset INTEGER, desc TEXT, names TEXT)'
+        )
+        connection.execute('CREATE TABLE names (name TEXT, row INTEGER)')
+        n_entities = 0
+        for row, (offset, entity_id, desc, names) in enumerate(scan_dump(dump_path, n_workers=n_workers)):
+            connection.execute('INSERT INTO entities VALUES (?, ?, ?, ?, ?)',
+                                (row, entity_id, offset, desc, orjson.dumps(names).decode('utf-8')))
+            connection.executemany('INSERT INTO names VALUES (?, ?)', [(name, row) for name in names])
+            n_entities += 1
+        # индекс по названиям создаётся после вставки: так сборка заметно быстрее
+        connection.execute('CREATE INDEX names_name ON names (name)')
+        connection.execute('CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)')
+        connection.executemany('INSERT INTO metadata VALUES (?, ?)',
+                               [('build_id', uuid.uuid4().hex), ('n_entities', str(n_entities))])
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, index_path)
+    return n_entities
+
+
+class NameIndex:
+    """ Поиск сущностей по названиям в индексе, построенном build_name_index """
+
+    def __init__(self, index_path: str = WIKIDATA_NAME_INDEX_PATH):
+        """
+        :param index_path: Путь к файлу индекса
+        """
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f'Name index {index_path} not found, build it with build_name_index')
+        self._connection = sqlite3.connect(f'file:{index_path}?mode=ro', uri=True, check_same_thread=False)
+
+    def lookup(self, names: Set[str]) -> List[Dict[str, Any]]:
+        """ Ищет сущности, у которых есть хотя бы одно из названий
+
+        :param names: Названия в нижнем регистре
+        :return: Список словарей (идентификатор, описание, названия, номер записи) в порядке следования сущностей в
+        дампе
+        """
+        names = list(names)
+        entities = dict()
+        for start in range(0, len(names), MAX_QUERY_PARAMS):
+            chunk = names[start: start + MAX_QUERY_PARAMS]
+            rows = self._connection.execute(
+                'SELECT DISTINCT e.row, e.id, e.desc, e.names FROM names n JOIN entities e ON e.row = n.row '
+                f'WHERE n.name IN ({", ".join("?" * len(chunk))})',
+                chunk
+            )
+            for row, entity_id, desc, entity_names in rows:
+                entities[row] = {'id': entity_id, 'desc': desc, 'names': orjson.loads(entity_names), 'row': row}
+        return [entities[row] for row in sorted(entities)]
+
+    def __len__(self) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+
+    def iter_entities(self) -> Iterator[Tuple[int, str, str, List[str]]]:
+        """ Перебирает все сущности индекса
+
+        :return: Номер записи, идентификатор, описание и названия для каждой сущности в порядке номеров записей
+        """
+        for row, entity_id, desc, entity_names in self._connection.execute(
+                'SELECT row, id, desc, names FROM entities ORDER BY row'):
+            yield row, entity_id, desc, orjson.loads(entity_names)
+
+    def get_metadata(self) -> Dict[str, str]:
+        """
+        :return: Метаданные сборки индекса: build_id и n_entities (пустой словарь для индексов старого формата)
+        """
+        if self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metadata'").fetchone() is None:
+            return dict()
+        return dict(self._connection.execute('SELECT key, value FROM metadata'))
+
+    def close(self):
+        self._connection.close()
+
+
+if __name__ == '__main__':
+    n = build_name_index(n_workers=os.cpu_count())
+    print(f'Name index with {n} entities saved to {WIKIDATA_NAME_INDEX_PATH}')
@@ -1,48 +1,52 @@
-from typing import List, Dict, Set, Any
+from collections import defaultdict
+from typing import List, Dict, Set, Any, Tuple
 
-import orjson
-
-from entity_linker.entity_linking_pipeline.candidates_generator import BaseCandidatesGenerator
+from entity_linker.entity_linking_pipeline.candidates_generator.base_candidates_generator import BaseCandidatesGenerator
+from entity_linker.entity_linking_pipeline.dump_scanner import scan_dump
 
 
 class StringMatchCandidatesGenerator(BaseCandidatesGenerator):
     """ Генерация кандидатов по построковому совпадению """
 
-    def __init__(self):
+    def __init__(self, n_workers: int = 1):
+        """
+        :param n_workers: Количество процессов, разбирающих дамп (см. dump_scanner)
+        """
         super().__init__()
+        self._n_workers = n_workers
 
     def create_candidates_set(self, normalized_term: str, queries: Set[str]):
         return self._get_string_match_candidates(normalized_term, queries)
 
+    def create_candidates_batch(self, terms_with_queries: List[Tuple[str, Set[str]]]) -> List[List[Dict[str, Any]]]:
+        """ Создание множеств кандидатов для нескольких терминов за один просмотр дампа: каждое название сущности
+        ищется в общем словаре запрос -> номера терминов
+
+        :param terms_with_queries: список пар (термин, набор запросов)
+        :return: список кандидатов для каждого термина (в порядке следования сущностей в дампе)
+        """
+        query2terms = defaultdict(set)
+        for i, (normalized_term, queries) in enumerate(terms_with_queries):
+            query2terms[normalized_term].add(i)
+            for query in queries:
+                query2terms[query].add(i)
+
+        result = [list() for _ in terms_with_queries]
+        print(f'iter dump for {len(terms_with_queries)} entities...')
+        for _, entity_id, desc, names in scan_dump(self._dump_path, n_workers=self._n_workers):
+            matched_terms = set()
+            for name in names:
+                matched_terms.update(query2terms.get(name, ()))
+            # у каждого термина свой экземпляр кандидата: ранжировщики изменяют список названий
+            for i in sorted(matched_terms):
+                result[i].append({'id': entity_id, 'desc': desc, 'names': list(names)})
+        return result
+
     def _get_string_match_candidates(self, normalized_term: str, queries: Set[str]) -> List[Dict[str, Any]]:
         result = list()
         print(f'iter dump for entity [{normalized_term}]...')
-        with open(self._dump_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line == '\n':
-                    continue
-                try:
-                    entity = orjson.loads(line)
-                except orjson.JSONDecodeError:
-                    continue
-                if entity['type'] != 'item':
-                    continue
-                entity_names = set()
-                if 'label' in entity:
-                    entity_names.add(entity['label']['value'].lower())
-                if 'alias' in entity:
-                    for alias in entity['alias']:
-                        entity_names.add(alias['value'].lower())
-                desc = ''
-                if 'description' in entity:
-                    desc = entity['description']['value']
-                    if 'страница значений' in desc.lower():
-                        continue
-                if normalized_term in entity_names:
-                    result.append({'id': entity['id'], 'desc': desc, 'names': list(entity_names)})
-                else:
-                    for t in queries:
-                        if t in entity_names:
-                            result.append({'id': entity['id'], 'desc': desc, 'names': list(entity_names)})
-                            break
+        for _, entity_id, desc, names in scan_dump(self._dump_path, n_workers=self._n_workers):
+            entity_names = set(names)
+            if normalized_term in entity_names or any(t in entity_names for t in queries):
+                result.append({'id': entity_id, 'desc': desc, 'names': names})
         return result
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import orjson
+
+from entity_linker.entity_linking_pipeline.candidates_generator.name_index import build_name_index
+from entity_linker.entity_linking_pipeline.candidates_generator.trigram_index import (
+    TrigramIndex, build_trigram_index, get_trigrams
+)
+from entity_linker.entity_linking_pipeline.candidates_generator.index_candidates_generator import (
+    IndexCandidatesGenerator
+)
+from entity_linker.entity_linking_pipeline.candidates_generator.fuzzy_candidates_generator import (
+    FuzzyCandidatesGenerator
+)
+from entity_linker.entity_linking_pipeline.candidates_generator.test.test_index_candidates_generator import (
+    TEST_ENTITIES
+)
+
+
+class TestFuzzyCandidatesGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        dump_path = os.path.join(self._dir.name, 'dump.json')
+        self._index_path = os.path.join(self._dir.name, 'name_index.sqlite')
+        with open(dump_path, 'wb') as f:
+            for entity in TEST_ENTITIES:
+                f.write(orjson.dumps(entity) + b'\n')
+        build_name_index(dump_path, self._index_path)
+        build_trigram_index(self._index_path)
+        self._trigram_index = TrigramIndex(self._index_path)
+
+    def tearDown(self):
+        self._trigram_index.close()
+        self._dir.cleanup()
+
+    def test_get_trigrams(self):
+        self.assertEqual({'#сл', 'слу', 'лух', 'ух#'}, get_trigrams('слух'))
+
+    def test_search(self):
+        self.assertEqual([('тугоухость', 1.0)], self._trigram_index.search('тугоухость', top_k=1))
+        names = [name for name, _ in self._trigram_index.search('тугаухость', min_similarity=0.3)]
+        self.assertEqual(['тугоухость'], names)
+        names = [name for name, _ in self._trigram_index.search('нарушения слуха')]
+        self.assertEqual(['нарушение слуха'], names)
+        self.assertEqual([], self._trigram_index.search('звук'))
+
+    def test_length_bounds_limit_scan(self):
+        connection = self._trigram_index._connection
+        name_ids = dict(connection.execute('SELECT name, name_id FROM name_ids'))
+        trigrams = list(get_trigrams('слух'))
+        # 'нарушение слуха' делит с запросом триграммы, но длиннее n / s и не должно попасть в подсчёт
+        shared = connection.execute(TrigramIndex._shared_trigrams_query(len(trigrams)), trigrams + [2, 8])
+        counted = {name_id for name_id, _, _ in shared}
+        self.assertIn(name_ids['слух'], counted)
+        self.assertNotIn(name_ids['нарушение слуха'], counted)
+        plan = ' '.join(row[-1] for row in connection.execute(
+            'EXPLAIN QUERY PLAN ' + TrigramIndex._shared_trigrams_query(len(trigrams)), trigrams + [2, 8]
+        ))
+        self.assertIn('n_trigrams>? AND n_trigrams<?', plan)
+
+    def test_candidates_generator(self):
+        generator = FuzzyCandidatesGenerator(self._index_path, min_similarity=0.3)
+        candidates = generator.create_candidates_set('тугаухость', set())
+        self.assertEqual(['Q12133', 'Q3'], [candidate['id'] for candidate in candidates])
+
+    def test_with_exact_generator(self):
+        generator = FuzzyCandidatesGenerator(self._index_path, min_similarity=0.6,
+                                             exact_generator=IndexCandidatesGenerator(self._index_path))
+        candidates = generator.create_candidates_set('нарушения слуха', {'слух'})
+        self.assertEqual(['Q2', 'Q12133'], [candidate['id'] for candidate in candidates])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import orjson
+
+from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex, build_name_index
+from entity_linker.entity_linking_pipeline.candidates_generator.index_candidates_generator import (
+    IndexCandidatesGenerator
+)
+
+TEST_ENTITIES = [
+    {'type': 'item', 'id': 'Q12133', 'label': {'value': 'Нарушение слуха'},
+     'description': {'value': 'снижение способности обнаруживать и понимать звуки'},
+     'alias': [{'value': 'глухота'}, {'value': 'тугоухость'}]},
+    {'type': 'property', 'id': 'P31', 'label': {'value': 'глухота'}},
+    {'type': 'item', 'id': 'Q1', 'label': {'value': 'Глухота'},
+     'description': {'value': 'страница значений в проекте Викимедиа'}},
+    {'type': 'item', 'id': 'Q2', 'label': {'value': 'Слух'}, 'description': {'value': 'одно из чувств'}},
+    {'type': 'item', 'id': 'Q3', 'label': {'value': 'Тугоухость'}},
+]
+
+
+class TestIndexCandidatesGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._dump_path = os.path.join(self._dir.name, 'dump.json')
+        self._index_path = os.path.join(self._dir.name, 'name_index.sqlite')
+        with open(self._dump_path, 'wb') as f:
+            for entity in TEST_ENTITIES:
+                f.write(orjson.dumps(entity) + b'\n')
+            f.write(b'\n')
+        build_name_index(self._dump_path, self._index_path)
+        self._candidates_generator = IndexCandidatesGenerator(self._index_path)
+
+    def tearDown(self):
+        self._candidates_generator._name_index.close()
+        self._dir.cleanup()
+
+    def test_candidates_generator(self):
+        candidates = self._candidates_generator.create_candidates_set('нарушение слуха', {'тугоухость'})
+        self.assertEqual(['Q12133', 'Q3'], [candidate['id'] for candidate in candidates])
+        self.assertEqual('снижение способности обнаруживать и понимать звуки', candidates[0]['desc'])
+        self.assertEqual({'нарушение слуха', 'глухота', 'тугоухость'}, set(candidates[0]['names']))
+
+    def test_not_found(self):
+        self.assertEqual([], self._candidates_generator.create_candidates_set('звук', set()))
+
+    def test_metadata(self):
+        metadata = self._candidates_generator._name_index.get_metadata()
+        self.assertEqual(str(len(self._candidates_generator._name_index)), metadata['n_entities'])
+        build_name_index(self._dump_path, self._index_path)
+        name_index = NameIndex(self._index_path)
+        self.assertNotEqual(metadata['build_id'], name_index.get_metadata()['build_id'])
+        name_index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
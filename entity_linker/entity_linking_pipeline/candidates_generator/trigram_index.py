@@ -0,0 +1,118 @@
+""" Нечёткий поиск названий сущностей по символьным триграммам.
+
+Триграммный индекс добавляется в базу индекса названий (см. name_index) таблицами name_ids (название, количество его
+триграмм) и trigrams (триграмма -> номер названия, количество его триграмм). Строится после индекса названий
+командой
+
+    python -m entity_linker.entity_linking_pipeline.candidates_generator.trigram_index
+"""
+import os
+import sqlite3
+from typing import List, Set, Tuple
+
+from utils.paths import WIKIDATA_NAME_INDEX_PATH
+
+# границы слова дополняются этим символом, чтобы начало и конец названия давали собственные триграммы
+PADDING = '#'
+BATCH_SIZE = 10000
+
+
+def get_trigrams(name: str) -> Set[str]:
+    """
+    :param name: Название в нижнем регистре
+    :return: Множество символьных триграмм названия
+    """
+    padded = f'{PADDING}{name}{PADDING}'
+    return {padded[i: i + 3] for i in range(len(padded) - 2)}
+
+
+def build_trigram_index(index_path: str = WIKIDATA_NAME_INDEX_PATH) -> int:
+    """ Строит триграммный индекс по всем названиям индекса названий (старый триграммный индекс удаляется)
+
+    :param index_path: Путь к индексу названий
+    :return: Количество проиндексированных названий
+    """
+    connection = sqlite3.connect(index_path)
+    try:
+        connection.execute('DROP TABLE IF EXISTS trigrams')
+        connection.execute('DROP TABLE IF EXISTS name_ids')
+        connection.execute('CREATE TABLE name_ids (name_id INTEGER PRIMARY KEY, name TEXT, n_trigrams INTEGER)')
+        connection.execute('CREATE TABLE trigrams (trigram TEXT, name_id INTEGER, n_trigrams INTEGER)')
+        names = connection.execute('SELECT DISTINCT name FROM names ORDER BY name')
+        n_names = 0
+        while True:
+            batch = names.fetchmany(BATCH_SIZE)
+            if not batch:
+                break
+            for (name,) in batch:
+                trigrams = get_trigrams(name)
+                connection.execute('INSERT INTO name_ids VALUES (?, ?, ?)', (n_names, name, len(trigrams)))
+                connection.executemany('INSERT INTO trigrams VALUES (?, ?, ?)',
+                                       [(trigram, n_names, len(trigrams)) for trigram in trigrams])
+                n_names += 1
+        # индекс по триграммам создаётся после вставки: так сборка заметно быстрее. Количество триграмм входит в
+        # индекс, чтобы при поиске из списка названий триграммы читались только названия подходящей длины
+        connection.execute('CREATE INDEX trigrams_trigram ON trigrams (trigram, n_trigrams, name_id)')
+        connection.commit()
+    finally:
+        connection.close()
+    return n_names
+
+
+class TrigramIndex:
+    """ Поиск названий, похожих на запрос, по коэффициенту Жаккара множеств триграмм """
+
+    def __init__(self, index_path: str = WIKIDATA_NAME_INDEX_PATH):
+        """
+        :param index_path: Путь к индексу названий с триграммным индексом
+        """
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f'Name index {index_path} not found, build it with build_name_index')
+        self._connection = sqlite3.connect(f'file:{index_path}?mode=ro', uri=True, check_same_thread=False)
+
+    def search(self, query: str, top_k: int = 10, min_similarity: float = 0.5) -> List[Tuple[str, float]]:
+        """ Ищет названия, наиболее похожие на запрос
+
+        :param query: Запрос в нижнем регистре
+        :param top_k: Максимальное количество названий
+        :param min_similarity: Минимальный коэффициент Жаккара
+        :return: Список пар (название, коэффициент Жаккара) по убыванию похожести
+        """
+        trigrams = list(get_trigrams(query))
+        n = len(trigrams)
+        # при J >= s количество триграмм названия лежит в пределах [s * n, n / s], остальные названия не
+        # рассматриваются
+        min_trigrams = min_similarity * n
+        max_trigrams = n / min_similarity if min_similarity > 0 else float('inf')
+        rows = self._connection.execute(
+            'SELECT n.name, t.shared * 1.0 / (? + t.n_trigrams - t.shared) AS similarity '
+            f'FROM ({self._shared_trigrams_query(n)}) t '
+            'JOIN name_ids n ON n.name_id = t.name_id '
+            'WHERE similarity >= ? '
+            'ORDER BY similarity DESC, n.name LIMIT ?',
+            [n] + trigrams + [min_trigrams, max_trigrams, min_similarity, top_k]
+        )
+        return [(name, similarity) for name, similarity in rows]
+
+    @staticmethod
+    def _shared_trigrams_query(n_trigrams: int) -> str:
+        """ Пересечение списков названий для триграмм запроса: количество общих триграмм с каждым названием.
+        Границы количества триграмм названия проверяются по индексу (trigram, n_trigrams), так что названия
+        неподходящей длины не читаются и не считаются
+
+        :param n_trigrams: Количество триграмм запроса
+        :return: SQL-запрос с параметрами: триграммы запроса, минимальное и максимальное количество триграмм названия
+        """
+        return (
+            'SELECT name_id, n_trigrams, COUNT(*) AS shared FROM trigrams '
+            f'WHERE trigram IN ({", ".join("?" * n_trigrams)}) AND n_trigrams BETWEEN ? AND ? '
+            'GROUP BY name_id, n_trigrams'
+        )
+
+    def close(self):
+        self._connection.close()
+
+
+if __name__ == '__main__':
+    n = build_trigram_index()
+    print(f'Trigram index with {n} names saved to {WIKIDATA_NAME_INDEX_PATH}')
@@ -1,5 +1,6 @@
 from entity_linker.entity_linking_pipeline.candidates_ranger.base_ranger import BaseCandidatesRanger
 from entity_linker.entity_linking_pipeline.candidates_ranger.cosine_sim_ranger import CosineSimRanger
 from entity_linker.entity_linking_pipeline.candidates_ranger.cosine_sim_with_weights import CosineSimRangerWeights
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_matrix_ranger import EmbeddingMatrixRanger
 
-__all__ = [BaseCandidatesRanger, CosineSimRanger, CosineSimRangerWeights]
+__all__ = [BaseCandidatesRanger, CosineSimRanger, CosineSimRangerWeights, EmbeddingMatrixRanger]
@@ -1,48 +1,95 @@
 import re
-import functools
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import OrderedDict
 
 import numpy as np
 import fasttext as ft
 from sklearn.metrics.pairwise import cosine_similarity
 
-from utils.normalize import normalize_mystem
-from entity_linker.entity_linking_pipeline.candidates_ranger import BaseCandidatesRanger
+from utils.normalize import MystemPool, normalize_mystem, normalize_mystem_batch
+from entity_linker.entity_linking_pipeline.candidates_ranger.base_ranger import BaseCandidatesRanger
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_cache import EmbeddingCache, phrase_embedding_cache
 from utils.paths import FASTTEXT_MODEL_PATH
 
 
 class CosineSimRanger(BaseCandidatesRanger):
 
-    def __init__(self):
-        fasttext_model_path = FASTTEXT_MODEL_PATH
+    def __init__(self, embedding_cache: Optional[EmbeddingCache] = None, mystem_pool: Optional[MystemPool] = None):
+        """
+        :param embedding_cache: Кэш векторов фраз (по умолчанию общий для всех ранжировщиков)
+        :param mystem_pool: Пул процессов Mystem для лемматизации из нескольких потоков (по умолчанию общий процесс)
+        """
         self._ft_model = ft.load_model(FASTTEXT_MODEL_PATH)
+        self._embedding_cache = embedding_cache if embedding_cache is not None else phrase_embedding_cache
+        self._mystem_pool = mystem_pool
 
     def range_candidates_set(self, candidates: List[Dict[str, Any]], context: List[str], **kwargs) -> Dict[str, float]:
-        _context_vector = self._get_vector_for_phrase(' '.join(context))
-        sorted_candidates = self._range_candidates_by_cosine_similarity(candidates, _context_vector)
+        # контекст и все кандидаты лемматизируются за одно обращение к Mystem
+        for candidate_dict in candidates:
+            candidate_dict['names'].extend([candidate_dict['desc']])
+        vectors = self._get_vectors_for_phrases(
+            [' '.join(context)] + [' '.join(candidate_dict['names']) for candidate_dict in candidates]
+        )
+        sorted_candidates = self._range_candidates_by_cosine_similarity(candidates, vectors[0], vectors[1:])
         return sorted_candidates
 
-    def _range_candidates_by_cosine_similarity(self, candidates: List[Dict[str, Any]], vector) -> Dict[str, int]:
+    def _range_candidates_by_cosine_similarity(self, candidates: List[Dict[str, Any]], vector,
+                                               candidate_vectors: List[np.array]) -> Dict[str, int]:
         distances = dict()
-        for candidate_dict in candidates:
-            full_desc = candidate_dict['names']
-            full_desc.extend([candidate_dict['desc']])
-            candidate_vector = self._get_vector_for_phrase(' '.join(full_desc))
+        for candidate_dict, candidate_vector in zip(candidates, candidate_vectors):
             distances[candidate_dict['id']] = cosine_similarity([vector], [candidate_vector])[0]
         sorted_candidates = OrderedDict(sorted(distances.items(), key=lambda x: x[1], reverse=True))
 
         return sorted_candidates
 
-    @functools.lru_cache(maxsize=10000)
     def _get_vector_for_phrase(self, phrase: str) -> np.array:
-        """ Считает вектор для фразы/строки
+        """ Считает вектор для фразы/строки (векторы кэшируются по нормализованной фразе)
         :param phrase: строка
         :return: усредненный вектор
         """
+        phrase = self._clean_phrase(phrase)
+        if self._mystem_pool is not None:
+            normalized_phrase = self._mystem_pool.normalize(phrase)
+        else:
+            normalized_phrase = normalize_mystem(phrase)
+        return self._get_vector_for_normalized_phrase(normalized_phrase)
+
+    def _get_vectors_for_phrases(self, phrases: List[str], use_cache: bool = True) -> List[np.array]:
+        """ Считает векторы нескольких фраз, лемматизируя их за одно обращение к Mystem
+        :param phrases: строки
+        :param use_cache: брать и сохранять векторы в кэше векторов фраз
+        :return: усредненные векторы
+        """
+        phrases = [self._clean_phrase(phrase) for phrase in phrases]
+        if self._mystem_pool is not None:
+            normalized_phrases = self._mystem_pool.normalize_batch(phrases)
+        else:
+            normalized_phrases = normalize_mystem_batch(phrases)
+        if not use_cache:
+            return [self._compute_vector(phrase.split()) for phrase in normalized_phrases]
+        vectors = [self._embedding_cache.get(phrase) for phrase in normalized_phrases]
+        # векторы, которых нет в кэше, считаются по одному разу и сохраняются в кэш вместе
+        misses = list(dict.fromkeys(phrase for phrase, vector in zip(normalized_phrases, vectors) if vector is None))
+        computed = dict(zip(misses, self._embedding_cache.put_many(
+            [(phrase, self._compute_vector(phrase.split())) for phrase in misses]
+        )))
+        return [
+            vector if vector is not None else computed[phrase] for phrase, vector in zip(normalized_phrases, vectors)
+        ]
+
+    @staticmethod
+    def _clean_phrase(phrase: str) -> str:
         phrase = re.sub('[.,!?:;]', ' ', phrase)
-        phrase = re.sub(' {2}', ' ', phrase)
-        wordlist = normalize_mystem(phrase).split()
+        return re.sub(' {2}', ' ', phrase)
+
+    def _get_vector_for_normalized_phrase(self, normalized_phrase: str) -> np.array:
+        vector = self._embedding_cache.get(normalized_phrase)
+        if vector is None:
+            vector = self._embedding_cache.put(normalized_phrase, self._compute_vector(normalized_phrase.split()))
+        return vector
+
+    def _compute_vector(self, wordlist: List[str]) -> np.array:
+        """ Усредняет векторы fastText слов нормализованной фразы """
         sentence_vec = np.zeros((300,))
         number_of_words = len(wordlist)
         for word in wordlist:
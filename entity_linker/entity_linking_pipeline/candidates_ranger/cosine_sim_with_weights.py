@@ -1,6 +1,7 @@
 from typing import List, Dict, Any
 from collections import OrderedDict
 
+import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
 from entity_linker.entity_linking_pipeline.candidates_ranger import CosineSimRanger
@@ -10,16 +11,20 @@ class CosineSimRangerWeights(CosineSimRanger):
 
     def range_candidates_set(self, candidates: List[Dict[str, Any]], context: List[str], term: str = None)\
             -> Dict[str, float]:
-        _context_vector = self._get_vector_for_phrase(' '.join(context))
-        sorted_candidates = self._range_candidates_by_cosine_similarity_weights(candidates, _context_vector, term)
+        # контекст и все кандидаты лемматизируются за одно обращение к Mystem
+        vectors = self._get_vectors_for_phrases(
+            [' '.join(context)] + [' '.join(list(candidate_dict['names']) + [candidate_dict['desc']])
+                                   for candidate_dict in candidates]
+        )
+        sorted_candidates = self._range_candidates_by_cosine_similarity_weights(candidates, vectors[0], vectors[1:],
+                                                                                term)
         return sorted_candidates
 
-    def _range_candidates_by_cosine_similarity_weights(self, candidates: List[Dict[str, Any]], vector: int, term: str = None) -> Dict[str, float]:
+    def _range_candidates_by_cosine_similarity_weights(self, candidates: List[Dict[str, Any]], vector,
+                                                       candidate_vectors: List[np.array], term: str = None)\
+            -> Dict[str, float]:
         distances = dict()
-        for candidate_dict in candidates:
-            full_desc = list(candidate_dict['names'])
-            full_desc.extend([candidate_dict['desc']])
-            candidate_vector = self._get_vector_for_phrase(' '.join(full_desc))
+        for candidate_dict, candidate_vector in zip(candidates, candidate_vectors):
             weight = self._get_weight(candidate_dict['names'], term)
             distances[candidate_dict['id']] = cosine_similarity([vector], [candidate_vector])[0] * weight
         sorted_candidates = OrderedDict(sorted(distances.items(), key=lambda x: x[1], reverse=True))
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class EmbeddingCache:
+    """ Кэш векторов фраз, общий для ранжировщиков. Ключ - нормализованная фраза, векторы хранятся во float32.
+
+    Кэш ограничен по объёму в байтах (вытесняются давно не использованные векторы), потокобезопасен и ведёт
+    статистику попаданий и промахов (см. cache_info). Опционально векторы сохраняются в базу SQLite и переживают
+    перезапуск сервиса
+    """
+
+    def __init__(self, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES, persistent_path: Optional[str] = None):
+        """
+        :param max_bytes: Максимальный объём векторов и ключей в памяти
+        :param persistent_path: Путь к базе SQLite для постоянного хранения векторов (None - только память)
+        """
+        self._max_bytes = max_bytes
+        self._vectors = OrderedDict()
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._connection = None
+        if persistent_path is not None:
+            self._connection = sqlite3.connect(persistent_path, check_same_thread=False)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS vectors (phrase TEXT PRIMARY KEY, vector BLOB)')
+            self._connection.commit()
+
+    def get(self, phrase: str) -> Optional[np.ndarray]:
+        """
+        :param phrase: Нормализованная фраза
+        :return: Вектор фразы (только для чтения) или None, если его нет в кэше
+        """
+        with self._lock:
+            vector = self._vectors.get(phrase)
+            if vector is not None:
+                self._vectors.move_to_end(phrase)
+                self._hits += 1
+                return vector
+            if self._connection is not None:
+                row = self._connection.execute('SELECT vector FROM vectors WHERE phrase = ?', (phrase,)).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._put_in_memory(phrase, vector)
+                    self._disk_hits += 1
+                    return vector
+            self._misses += 1
+            return None
+
+    def put(self, phrase: str, vector: np.ndarray) -> np.ndarray:
+        """
+        :param phrase: Нормализованная фраза
+        :param vector: Вектор фразы
+        :return: Сохранённый в кэше вектор (float32, только для чтения)
+        """
+        return self.put_many([(phrase, vector)])[0]
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]) -> List[np.ndarray]:
+        """ Сохраняет несколько векторов, в постоянное хранилище - одной транзакцией
+
+        :param items: Пары (нормализованная фраза, вектор фразы)
+        :return: Сохранённые в кэше векторы (float32, только для чтения)
+        """
+        vectors = []
+        for _, vector in items:
+            vector = np.array(vector, dtype=np.float32)
+            vector.setflags(write=False)
+            vectors.append(vector)
+        phrases = [phrase for phrase, _ in items]
+        with self._lock:
+            for phrase, vector in zip(phrases, vectors):
+                self._put_in_memory(phrase, vector)
+            if self._connection is not None and items:
+                self._connection.executemany('INSERT OR REPLACE INTO vectors VALUES (?, ?)',
+                                             [(phrase, vector.tobytes()) for phrase, vector in zip(phrases, vectors)])
+                self._connection.commit()
+        return vectors
+
+    def cache_info(self) -> Dict[str, int]:
+        """ Статистика кэша: попадания в памяти и на диске, промахи, количество векторов и объём в памяти """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'currsize': len(self._vectors),
+                'nbytes': self._n_bytes,
+            }
+
+    def cache_clear(self):
+        """ Очищает кэш в памяти и статистику (постоянное хранилище не очищается) """
+        with self._lock:
+            self._vectors.clear()
+            self._n_bytes = 0
+            self._hits = self._disk_hits = self._misses = 0
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _put_in_memory(self, phrase: str, vector: np.ndarray):
+        if phrase in self._vectors:
+            self._n_bytes -= self._entry_size(phrase, self._vectors.pop(phrase))
+        size = self._entry_size(phrase, vector)
+        if size > self._max_bytes:
+            return
+        self._vectors[phrase] = vector
+        self._n_bytes += size
+        while self._n_bytes > self._max_bytes:
+            evicted_phrase, evicted_vector = self._vectors.popitem(last=False)
+            self._n_bytes -= self._entry_size(evicted_phrase, evicted_vector)
+
+    @staticmethod
+    def _entry_size(phrase: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(phrase.encode('utf-8'))
+
+
+# общий для процесса кэш, используется ранжировщиками по умолчанию
+phrase_embedding_cache = EmbeddingCache()
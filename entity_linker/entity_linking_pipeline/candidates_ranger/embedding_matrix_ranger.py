@@ -0,0 +1,173 @@
+""" Ранжирование кандидатов по заранее посчитанной матрице векторов сущностей.
+
+Матрица - L2-нормированные векторы названий и описаний всех сущностей индекса названий (строка матрицы - номер
+записи сущности, см. candidates_generator.name_index). Матрица хранится в .npy и открывается через memmap. Рядом с
+матрицей в .json сохраняются идентификатор сборки индекса названий и количество сущностей: матрица, построенная по
+другому индексу, не используется (см. is_embedding_matrix_valid). Строится один раз после индекса названий командой
+
+    python -m entity_linker.entity_linking_pipeline.candidates_ranger.embedding_matrix_ranger
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+
+from utils.normalize import MystemPool
+from utils.paths import WIKIDATA_EMBEDDINGS_PATH, WIKIDATA_NAME_INDEX_PATH
+from entity_linker.entity_linking_pipeline.candidates_ranger.cosine_sim_with_weights import CosineSimRangerWeights
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_cache import EmbeddingCache
+
+VECTOR_SIZE = 300
+# количество сущностей, лемматизируемых за одно обращение к Mystem при построении матрицы
+BUILD_BATCH_SIZE = 1000
+
+
+def build_embedding_matrix(ranger: 'EmbeddingMatrixRanger' = None, index_path: str = WIKIDATA_NAME_INDEX_PATH,
+                           matrix_path: str = WIKIDATA_EMBEDDINGS_PATH, dtype=np.float32) -> int:
+    """ Считает векторы всех сущностей индекса названий и сохраняет их в матрицу вместе с метаданными индекса.
+    Векторы сущностей не сохраняются в кэш векторов фраз
+
+    :param ranger: Ранжировщик, которым считаются векторы фраз (по умолчанию создаётся новый)
+    :param index_path: Путь к индексу названий
+    :param matrix_path: Путь к файлу матрицы
+    :param dtype: np.float32 или np.float16
+    :return: Количество сущностей
+    """
+    from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex
+
+    ranger = ranger or EmbeddingMatrixRanger(matrix_path=None)
+    metadata_path = get_metadata_path(matrix_path)
+    # метаданные старой матрицы удаляются до перезаписи, чтобы недостроенная матрица не считалась действительной
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+    name_index = NameIndex(index_path)
+    try:
+        index_metadata = name_index.get_metadata()
+        matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=dtype, shape=(len(name_index), VECTOR_SIZE))
+        rows, phrases = [], []
+        for row, _, desc, names in name_index.iter_entities():
+            rows.append(row)
+            phrases.append(ranger._get_candidate_phrase(names, desc))
+            if len(rows) == BUILD_BATCH_SIZE:
+                _fill_rows(matrix, ranger, rows, phrases)
+                rows, phrases = [], []
+        if rows:
+            _fill_rows(matrix, ranger, rows, phrases)
+        matrix.flush()
+    finally:
+        name_index.close()
+    with open(metadata_path, 'wb') as f:
+        f.write(orjson.dumps({'index_build_id': index_metadata.get('build_id'), 'n_entities': len(matrix)}))
+    return len(matrix)
+
+
+def _fill_rows(matrix: np.ndarray, ranger: 'EmbeddingMatrixRanger', rows: List[int], phrases: List[str]):
+    for row, vector in zip(rows, ranger._get_vectors_for_phrases(phrases, use_cache=False)):
+        matrix[row] = normalize(vector)
+
+
+def get_metadata_path(matrix_path: str) -> str:
+    """
+    :param matrix_path: Путь к файлу матрицы
+    :return: Путь к файлу метаданных матрицы
+    """
+    return f'{os.path.splitext(matrix_path)[0]}.json'
+
+
+def is_embedding_matrix_valid(index_path: str = WIKIDATA_NAME_INDEX_PATH,
+                              matrix_path: str = WIKIDATA_EMBEDDINGS_PATH) -> bool:
+    """ Проверяет, что матрица построена по текущей сборке индекса названий и целиком
+
+    :param index_path: Путь к индексу названий
+    :param matrix_path: Путь к файлу матрицы
+    :return: True, если матрицей можно пользоваться
+    """
+    from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex
+
+    metadata_path = get_metadata_path(matrix_path)
+    if not all(os.path.exists(path) for path in (index_path, matrix_path, metadata_path)):
+        return False
+    with open(metadata_path, 'rb') as f:
+        matrix_metadata = orjson.loads(f.read())
+    name_index = NameIndex(index_path)
+    try:
+        index_metadata = name_index.get_metadata()
+    finally:
+        name_index.close()
+    if index_metadata.get('build_id') is None or index_metadata['build_id'] != matrix_metadata.get('index_build_id'):
+        return False
+    n_entities = int(index_metadata['n_entities'])
+    return matrix_metadata.get('n_entities') == n_entities and len(np.load(matrix_path, mmap_mode='r')) == n_entities
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    """ L2-нормирует вектор, нулевой вектор остаётся нулевым """
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class EmbeddingMatrixRanger(CosineSimRangerWeights):
+    """ Ранжирование кандидатов по косинусной близости (с весами CosineSimRangerWeights) к контексту. Векторы
+    кандидатов, у которых есть номер записи, берутся из матрицы, и близости считаются одним матрично-векторным
+    произведением. Для остальных кандидатов векторы считаются как в CosineSimRanger
+    """
+
+    def __init__(self, matrix_path: str = WIKIDATA_EMBEDDINGS_PATH, use_weights: bool = True,
+                 embedding_cache: Optional[EmbeddingCache] = None, mystem_pool: Optional[MystemPool] = None,
+                 index_path: str = WIKIDATA_NAME_INDEX_PATH):
+        """
+        :param matrix_path: Путь к матрице векторов сущностей (None - без матрицы)
+        :param use_weights: Умножать близость на вес совпадения названий с термином
+        :param embedding_cache: Кэш векторов фраз (по умолчанию общий для всех ранжировщиков)
+        :param mystem_pool: Пул процессов Mystem для лемматизации из нескольких потоков (по умолчанию общий процесс)
+        :param index_path: Путь к индексу названий, по которому построена матрица
+        """
+        if matrix_path is not None and not is_embedding_matrix_valid(index_path, matrix_path):
+            raise ValueError(f'Embedding matrix {matrix_path} does not match name index {index_path}, '
+                             'rebuild it with build_embedding_matrix')
+        super().__init__(embedding_cache, mystem_pool)
+        self._matrix = np.load(matrix_path, mmap_mode='r') if matrix_path is not None else None
+        self._use_weights = use_weights
+
+    def range_candidates_set(self, candidates: List[Dict[str, Any]], context: List[str], term: str = None)\
+            -> Dict[str, float]:
+        indexed = [i for i, candidate in enumerate(candidates) if self._has_row(candidate)]
+        not_indexed = [i for i, candidate in enumerate(candidates) if not self._has_row(candidate)]
+        # контекст и кандидаты без векторов в матрице лемматизируются за одно обращение к Mystem
+        vectors = self._get_vectors_for_phrases(
+            [' '.join(context)] + [self._get_candidate_phrase(candidates[i]['names'], candidates[i]['desc'])
+                                   for i in not_indexed]
+        )
+        context_vector = normalize(vectors[0]).astype(np.float32)
+
+        similarities = np.zeros(len(candidates), dtype=np.float32)
+        if indexed:
+            rows = [candidates[i]['row'] for i in indexed]
+            similarities[indexed] = self._matrix[rows].astype(np.float32) @ context_vector
+        for i, candidate_vector in zip(not_indexed, vectors[1:]):
+            similarities[i] = normalize(candidate_vector) @ context_vector
+
+        distances = dict()
+        for candidate, similarity in zip(candidates, similarities.tolist()):
+            if self._use_weights:
+                similarity *= self._get_weight(candidate['names'], term)
+            distances[candidate['id']] = similarity
+        return OrderedDict(sorted(distances.items(), key=lambda x: x[1], reverse=True))
+
+    def get_candidate_vector(self, names: List[str], desc: str) -> np.ndarray:
+        """ Вектор кандидата - средний вектор его названий и описания """
+        return self._get_vector_for_phrase(self._get_candidate_phrase(names, desc))
+
+    @staticmethod
+    def _get_candidate_phrase(names: List[str], desc: str) -> str:
+        return ' '.join(list(names) + [desc])
+
+    def _has_row(self, candidate: Dict[str, Any]) -> bool:
+        return self._matrix is not None and candidate.get('row') is not None and candidate['row'] < len(self._matrix)
+
+
+if __name__ == '__main__':
+    n = build_embedding_matrix()
+    print(f'Embedding matrix with {n} entities saved to {WIKIDATA_EMBEDDINGS_PATH}')
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        entry_size = 300 * 4 + len('фраза 0'.encode('utf-8'))
+        cache = EmbeddingCache(max_bytes=2 * entry_size)
+        for i in range(2):
+            cache.put(f'фраза {i}', np.full(300, i, dtype=np.float64))
+        self.assertIsNotNone(cache.get('фраза 0'))
+        cache.put('фраза 2', np.zeros(300))
+        self.assertIsNone(cache.get('фраза 1'))
+        vector = cache.get('фраза 0')
+        self.assertEqual(np.float32, vector.dtype)
+        self.assertFalse(vector.flags.writeable)
+        info = cache.cache_info()
+        self.assertEqual(2, info['hits'])
+        self.assertEqual(1, info['misses'])
+        self.assertEqual(2, info['currsize'])
+        self.assertLessEqual(info['nbytes'], 2 * entry_size)
+
+    def test_persistent_tier(self):
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, 'cache.sqlite')
+            cache = EmbeddingCache(persistent_path=path)
+            cache.put('фраза', np.arange(300))
+            cache.close()
+
+            cache = EmbeddingCache(persistent_path=path)
+            np.testing.assert_array_equal(np.arange(300, dtype=np.float32), cache.get('фраза'))
+            self.assertEqual(1, cache.cache_info()['disk_hits'])
+            cache.get('фраза')
+            self.assertEqual(1, cache.cache_info()['hits'])
+            cache.close()
+
+    def test_put_many(self):
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, 'cache.sqlite')
+            cache = EmbeddingCache(persistent_path=path)
+            statements = []
+            cache._connection.set_trace_callback(statements.append)
+            vectors = cache.put_many([(f'фраза {i}', np.full(300, i)) for i in range(3)])
+            self.assertEqual([np.float32] * 3, [vector.dtype for vector in vectors])
+            self.assertEqual(1, sum(statement == 'COMMIT' for statement in statements))
+            cache.close()
+
+            cache = EmbeddingCache(persistent_path=path)
+            np.testing.assert_array_equal(np.full(300, 2, dtype=np.float32), cache.get('фраза 2'))
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
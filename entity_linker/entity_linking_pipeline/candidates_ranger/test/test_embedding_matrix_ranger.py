@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import orjson
+
+from entity_linker.entity_linking_pipeline.candidates_generator.name_index import NameIndex, build_name_index
+from entity_linker.entity_linking_pipeline.candidates_generator.test.test_index_candidates_generator import (
+    TEST_ENTITIES
+)
+from entity_linker.entity_linking_pipeline.candidates_ranger.embedding_matrix_ranger import (
+    VECTOR_SIZE, get_metadata_path, is_embedding_matrix_valid
+)
+
+
+class TestEmbeddingMatrixValidity(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._dump_path = os.path.join(self._dir.name, 'dump.json')
+        self._index_path = os.path.join(self._dir.name, 'name_index.sqlite')
+        self._matrix_path = os.path.join(self._dir.name, 'entity_embeddings.npy')
+        with open(self._dump_path, 'wb') as f:
+            for entity in TEST_ENTITIES:
+                f.write(orjson.dumps(entity) + b'\n')
+        self._n_entities = build_name_index(self._dump_path, self._index_path)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _save_matrix(self, n_rows: int, build_id: str):
+        np.save(self._matrix_path, np.zeros((n_rows, VECTOR_SIZE), dtype=np.float32))
+        with open(get_metadata_path(self._matrix_path), 'wb') as f:
+            f.write(orjson.dumps({'index_build_id': build_id, 'n_entities': n_rows}))
+
+    def _build_id(self) -> str:
+        name_index = NameIndex(self._index_path)
+        try:
+            return name_index.get_metadata()['build_id']
+        finally:
+            name_index.close()
+
+    def test_valid(self):
+        self._save_matrix(self._n_entities, self._build_id())
+        self.assertTrue(is_embedding_matrix_valid(self._index_path, self._matrix_path))
+
+    def test_without_metadata(self):
+        self._save_matrix(self._n_entities, self._build_id())
+        os.remove(get_metadata_path(self._matrix_path))
+        self.assertFalse(is_embedding_matrix_valid(self._index_path, self._matrix_path))
+
+    def test_rebuilt_index(self):
+        self._save_matrix(self._n_entities, self._build_id())
+        build_name_index(self._dump_path, self._index_path)
+        self.assertFalse(is_embedding_matrix_valid(self._index_path, self._matrix_path))
+
+    def test_wrong_size(self):
+        self._save_matrix(self._n_entities - 1, self._build_id())
+        self.assertFalse(is_embedding_matrix_valid(self._index_path, self._matrix_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+""" Параллельный просмотр дампа Wikidata.
+
+Дамп делится на фрагменты по границам строк, фрагменты разбираются в пуле процессов, к каждой строке применяется
+проекция - функция, которая отбирает сущности и оставляет от них только нужные поля. Результаты возвращаются в
+порядке следования строк в дампе.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import orjson
+
+from utils.paths import WIKIDATA_DUMP_PATH
+
+DISAMBIGUATION_PAGE = 'страница значений'
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# проекция получает смещение строки в байтах и саму строку и возвращает None, если строка не нужна
+Projection = Callable[[int, bytes], Optional[Any]]
+
+
+def parse_entity(line: bytes) -> Optional[Tuple[str, str, List[str]]]:
+    """ Разбирает строку дампа
+
+    :param line: Строка дампа
+    :return: Идентификатор, описание и названия (в нижнем регистре) сущности или None, если строка не является
+    сущностью или описывает страницу значений
+    """
+    if line.strip() == b'':
+        return None
+    try:
+        entity = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    if entity['type'] != 'item':
+        return None
+    entity_names = set()
+    if 'label' in entity:
+        entity_names.add(entity['label']['value'].lower())
+    if 'alias' in entity:
+        for alias in entity['alias']:
+            entity_names.add(alias['value'].lower())
+    desc = ''
+    if 'description' in entity:
+        desc = entity['description']['value']
+        if DISAMBIGUATION_PAGE in desc.lower():
+            return None
+    return entity['id'], desc, list(entity_names)
+
+
+def project_entity(offset: int, line: bytes) -> Optional[Tuple[int, str, str, List[str]]]:
+    """ Проекция по умолчанию: сущности (кроме страниц значений) с названиями и описанием
+
+    :return: Смещение строки, идентификатор, описание и названия сущности
+    """
+    entity = parse_entity(line)
+    if entity is None:
+        return None
+    return (offset,) + entity
+
+
+def get_chunks(dump_path: str, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """ Делит дамп на фрагменты размером около chunk_size байт, каждый фрагмент начинается с начала строки
+
+    :param dump_path: Путь к дампу
+    :param chunk_size: Размер фрагмента в байтах
+    :return: Список фрагментов (начало, конец (не включительно))
+    """
+    size = os.path.getsize(dump_path)
+    boundaries = [0]
+    with open(dump_path, 'rb') as f:
+        while boundaries[-1] + chunk_size < size:
+            # строка, в которую попала граница, целиком относится к предыдущему фрагменту
+            f.seek(boundaries[-1] + chunk_size - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def scan_chunk(dump_path: str, start: int, end: int, projection: Projection = project_entity) -> List[Any]:
+    """ Применяет проекцию к строкам одного фрагмента
+
+    :param dump_path: Путь к дампу
+    :param start: Начало фрагмента
+    :param end: Конец фрагмента (не включительно)
+    :param projection: Проекция
+    :return: Результаты проекции (кроме None) в порядке строк
+    """
+    results = []
+    offset = start
+    with open(dump_path, 'rb') as f:
+        f.seek(start)
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            result = projection(offset, line)
+            if result is not None:
+                results.append(result)
+            offset += len(line)
+    return results
+
+
+def scan_dump(dump_path: str = WIKIDATA_DUMP_PATH, projection: Projection = project_entity, n_workers: int = 1,
+              chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """ Просматривает дамп и применяет проекцию к каждой строке
+
+    :param dump_path: Путь к дампу
+    :param projection: Проекция, для n_workers > 1 должна сериализоваться pickle (функция уровня модуля)
+    :param n_workers: Количество процессов, при 1 дамп читается в текущем процессе
+    :param chunk_size: Размер фрагмента в байтах
+    :return: Результаты проекции (кроме None) в порядке следования строк в дампе
+    """
+    chunks = get_chunks(dump_path, chunk_size)
+    if n_workers == 1:
+        for start, end in chunks:
+            yield from scan_chunk(dump_path, start, end, projection)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # в обработке одновременно не больше 2 * n_workers фрагментов, чтобы результаты не копились в памяти,
+        # если их потребитель медленнее пула
+        pending = deque()
+        for start, end in chunks:
+            pending.append(executor.submit(scan_chunk, dump_path, start, end, projection))
+            if len(pending) >= 2 * n_workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
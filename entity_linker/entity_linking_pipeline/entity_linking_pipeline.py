@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Tuple
 
-from utils.normalize import normalize_mystem
+from utils.normalize import normalize_mystem, normalize_mystem_batch
 from entity_linker.entity_linking_pipeline.query_creator import BaseQueryCreator
 from entity_linker.entity_linking_pipeline.candidates_ranger import BaseCandidatesRanger
 from entity_linker.entity_linking_pipeline.candidates_generator import BaseCandidatesGenerator
@@ -20,3 +20,21 @@ class EntityLinkingPipeline:
         candidates = self._candidates_generator.create_candidates_set(normalized_term, queries)
         ranged_candidates = self._candidates_ranger.range_candidates_set(candidates, context, term=normalized_term)
         return ranged_candidates
+
+    def link_many(self, terms_with_contexts: List[Tuple[str, List[str]]]):
+        """ Связывает несколько терминов с сущностями. Кандидаты для всех терминов генерируются одним вызовом
+        (для StringMatchCandidatesGenerator - за один просмотр дампа)
+
+        :param terms_with_contexts: список пар (термин, список слов контекста)
+        :return: ранжированные кандидаты для каждого термина
+        """
+        normalized_terms = normalize_mystem_batch([term for term, _ in terms_with_contexts])
+        terms_with_queries = [
+            (normalized_term, self._query_creator.create_queries_set(normalized_term))
+            for normalized_term in normalized_terms
+        ]
+        candidates_batch = self._candidates_generator.create_candidates_batch(terms_with_queries)
+        return [
+            self._candidates_ranger.range_candidates_set(candidates, context, term=normalized_term)
+            for normalized_term, (_, context), candidates in zip(normalized_terms, terms_with_contexts, candidates_batch)
+        ]
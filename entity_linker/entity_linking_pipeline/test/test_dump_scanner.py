@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+import orjson
+
+from entity_linker.entity_linking_pipeline.dump_scanner import get_chunks, scan_dump
+
+
+def project_id(offset, line):
+    entity = orjson.loads(line) if line.strip() else None
+    if entity is None or entity['type'] != 'item':
+        return None
+    return offset, entity['id']
+
+
+class TestDumpScanner(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._dump_path = os.path.join(self._dir.name, 'dump.json')
+        with open(self._dump_path, 'wb') as f:
+            for i in range(200):
+                entity = {'type': 'item' if i % 3 else 'property', 'id': f'Q{i}',
+                          'label': {'value': f'Сущность {i}'}, 'description': {'value': 'описание ' * (i % 7)}}
+                if i % 10 == 1:
+                    entity['description'] = {'value': 'Страница значений в проекте Викимедиа'}
+                f.write(orjson.dumps(entity) + b'\n')
+        self._expected = [(f'Q{i}', f'сущность {i}') for i in range(200) if i % 3 and i % 10 != 1]
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_chunks(self):
+        chunks = get_chunks(self._dump_path, chunk_size=1000)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(0, chunks[0][0])
+        self.assertEqual(os.path.getsize(self._dump_path), chunks[-1][1])
+        with open(self._dump_path, 'rb') as f:
+            for (_, end), (start, _) in zip(chunks[:-1], chunks[1:]):
+                self.assertEqual(end, start)
+                f.seek(start - 1)
+                self.assertEqual(b'\n', f.read(1))
+
+    def test_scan_dump(self):
+        entities = list(scan_dump(self._dump_path, chunk_size=1000))
+        self.assertEqual(self._expected, [(entity_id, names[0]) for _, entity_id, _, names in entities])
+        with open(self._dump_path, 'rb') as f:
+            for offset, entity_id, _, _ in entities:
+                f.seek(offset)
+                self.assertEqual(entity_id, orjson.loads(f.readline())['id'])
+
+    def test_parallel_scan_dump(self):
+        sequential = list(scan_dump(self._dump_path, projection=project_id, chunk_size=1000))
+        parallel = list(scan_dump(self._dump_path, projection=project_id, n_workers=2, chunk_size=1000))
+        self.assertEqual(sequential, parallel)
+        self.assertEqual([i for i in range(200) if i % 3], [int(entity_id[1:]) for _, entity_id in parallel])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,20 +1,92 @@
+from typing import Iterable, List, Optional, Tuple
+
 from relation_extractor.rule_based_extractor.rule_based_extractor import RuleBasedExtractor
 from relation_extractor.dl_relation_extractor.dl_relation_extractor import DLRelationExtractor
+from relation_extractor.pair_generator.pair_generator import PairGenerator
 
 
 class CombinedRelationExtractor:
 
-    def __init__(self):
-        self._rule_based_extractor = RuleBasedExtractor()
-        self._dl_relation_extractor = DLRelationExtractor()
+    NO_RELATION = 'NO-RELATION'
+
+    def __init__(self, cascade: bool = False, trusted_patterns: Optional[Iterable[str]] = None,
+                 confidence_threshold: float = 0.0, crop_window: Optional[int] = None):
+        """
+        :param cascade: run the rule-based extractor first and skip the neural model for samples
+        matched by a trusted pattern
+        :param trusted_patterns: high-precision patterns for the cascade, required if cascade is set
+        :param confidence_threshold: minimum softmax probability of a neural prediction, less confident predictions
+        fall back to the rule-based extractor
+        :param crop_window: number of word pieces kept on each side of the entity pair by the neural model
+        """
+        if cascade and not trusted_patterns:
+            raise ValueError('Cascade mode requires trusted_patterns')
+        self._rule_based_extractor = RuleBasedExtractor(trusted_patterns=trusted_patterns if cascade else None)
+        self._dl_relation_extractor = DLRelationExtractor(crop_window=crop_window)
+        self._confidence_threshold = confidence_threshold
 
     def extract(self, sample: str) -> str:
-        dl_pred = self._dl_relation_extractor.extract(sample)
-        rule_based_pred = self._rule_based_extractor.predict_rule_based(sample)
-        predicted_relation = 'NO-RELATION'
-        if dl_pred != 'NO-RELATION':
+        return self.extract_batch([sample])[0]
+
+    def extract_batch(self, samples: List[str], batch_size: int = 32) -> List[str]:
+        """
+        Predict relations for many marked samples
+        :param samples: texts with <e1>...</e1> and <e2>...</e2> markers
+        :param batch_size: number of samples in one forward pass of the neural model
+        :return: relation for every sample
+        """
+        rule_based_preds = [self._rule_based_extractor.match_rule_based(sample) for sample in samples]
+        dl_indices = self._get_dl_indices(rule_based_preds)
+        dl_preds = self._dl_relation_extractor.extract_with_confidence(
+            [samples[i] for i in dl_indices], batch_size=batch_size
+        )
+        return self._combine_batch(rule_based_preds, dl_indices, dl_preds)
+
+    def extract_for_terms(
+            self, tokens: List[str], term_spans: List[Tuple[int, int]], max_distance: Optional[int] = None,
+            both_directions: bool = False, max_pairs: Optional[int] = None, batch_size: int = 32
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int], str]]:
+        """
+        Predict relations between terms of a tokenized sentence, e.g. the output of CombinedExtractor
+        (see utils.utilities.get_term_spans)
+        :param tokens: sentence tokens
+        :param term_spans: (start, end) token spans of terms, end is exclusive
+        :param max_distance: maximum number of tokens between two terms of a pair
+        :param both_directions: score (e2, e1) in addition to (e1, e2), where e1 is the left term
+        :param max_pairs: maximum number of pairs scored for the sentence, the nearest pairs are kept
+        :param batch_size: number of pairs in one forward pass of the neural model
+        :return: (e1 span, e2 span, relation) for every scored pair
+        """
+        pair_generator = PairGenerator(max_distance=max_distance, both_directions=both_directions,
+                                       max_pairs=max_pairs)
+        pairs = pair_generator.generate(term_spans)
+        rule_based_preds = [
+            self._rule_based_extractor.match_from_tokens(tokens, e1_span, e2_span) for e1_span, e2_span in pairs
+        ]
+        dl_indices = self._get_dl_indices(rule_based_preds)
+        dl_preds = self._dl_relation_extractor.extract_pairs_with_confidence(
+            tokens, [pairs[i] for i in dl_indices], batch_size=batch_size
+        )
+        relations = self._combine_batch(rule_based_preds, dl_indices, dl_preds)
+        return [(e1_span, e2_span, relation) for (e1_span, e2_span), relation in zip(pairs, relations)]
+
+    def _get_dl_indices(self, rule_based_preds: List[Tuple[str, Optional[str]]]) -> List[int]:
+        """ Indices of samples which need the neural model: all but those resolved by a trusted pattern """
+        return [
+            i for i, (_, pattern) in enumerate(rule_based_preds) if not self._rule_based_extractor.is_trusted(pattern)
+        ]
+
+    def _combine_batch(self, rule_based_preds: List[Tuple[str, Optional[str]]], dl_indices: List[int],
+                       dl_preds: List[Tuple[str, float]]) -> List[str]:
+        relations = [relation for relation, _ in rule_based_preds]
+        for i, (dl_pred, confidence) in zip(dl_indices, dl_preds):
+            relations[i] = self._combine(dl_pred, confidence, relations[i])
+        return relations
+
+    def _combine(self, dl_pred: str, confidence: float, rule_based_pred: str) -> str:
+        predicted_relation = self.NO_RELATION
+        if dl_pred != self.NO_RELATION and confidence >= self._confidence_threshold:
             predicted_relation = dl_pred
-        elif rule_based_pred != 'NO-RELATION':
+        elif rule_based_pred != self.NO_RELATION:
             predicted_relation = rule_based_pred
-
         return predicted_relation
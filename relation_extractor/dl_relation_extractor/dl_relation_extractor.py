@@ -1,18 +1,39 @@
 import torch
 import os
 import numpy as np
+from typing import Callable, List, Optional, Tuple
 
 from transformers import BertConfig
 from utils.paths import RELATION_EXTRACTOR_WEIGHTS_PATH
 from utils.constants import RE_LABELS
 from relation_extractor.dl_relation_extractor.model import get_model
+from relation_extractor.dl_relation_extractor.optimized_model import (
+    PARITY_SAMPLES, RBERTLogits, quantize_model, trace_model
+)
 from relation_extractor.dl_relation_extractor.vectorizer import Vectorizer
 
 
+FLOAT = 'float'
+QUANTIZED = 'quantized'
+TORCHSCRIPT = 'torchscript'
+QUANTIZED_TORCHSCRIPT = 'quantized_torchscript'
+
+
 class DLRelationExtractor:
 
-    def __init__(self):
-        self._vectorizer = Vectorizer()
+    NO_RELATION = 'NO-RELATION'
+
+    def __init__(self, backend: str = FLOAT, crop_window: Optional[int] = None):
+        """
+        :param backend: 'float' - the original model, 'quantized' - linear layers are dynamically quantized to int8,
+        'torchscript' - the model is traced into TorchScript, 'quantized_torchscript' - both.
+        Quantized backends run on CPU (see relation_extractor.dl_relation_extractor.optimized_model)
+        :param crop_window: number of word pieces kept on each side of the entity pair, by default the whole sentence
+        is used (see Vectorizer)
+        """
+        if backend not in (FLOAT, QUANTIZED, TORCHSCRIPT, QUANTIZED_TORCHSCRIPT):
+            raise ValueError(f'Unknown backend: {backend}')
+        self._vectorizer = Vectorizer(crop_window=crop_window)
         self._config = BertConfig.from_pretrained(
             RELATION_EXTRACTOR_WEIGHTS_PATH,
             num_labels=len(RE_LABELS),
@@ -20,29 +41,137 @@ class DLRelationExtractor:
             label2id={label: i for i, label in enumerate(RE_LABELS)},
         )
         self._model_args = torch.load(os.path.join(RELATION_EXTRACTOR_WEIGHTS_PATH, 'training_args.bin'))
-        self._device = "cuda" if torch.cuda.is_available() else "cpu"
-        self._model = get_model(RELATION_EXTRACTOR_WEIGHTS_PATH, self._config, self._model_args, self._device)
+        self._device = "cuda" if torch.cuda.is_available() and backend in (FLOAT, TORCHSCRIPT) else "cpu"
+        model = get_model(RELATION_EXTRACTOR_WEIGHTS_PATH, self._config, self._model_args, self._device)
+        if backend in (QUANTIZED, QUANTIZED_TORCHSCRIPT):
+            model = quantize_model(model)
+        # a traced model is specialized to the sequence length of the example, so its batches are padded to
+        # max_seq_len instead of the longest sample
+        self._pad_len = None
+        if backend in (TORCHSCRIPT, QUANTIZED_TORCHSCRIPT):
+            self._pad_len = self._model_args['max_seq_len']
+            example_inputs = self._vectorizer.pad_batch([self.convert(PARITY_SAMPLES[0])], max_len=self._pad_len)
+            self._model = trace_model(model, tuple(tensor.to(self._device) for tensor in example_inputs))
+        else:
+            self._model = RBERTLogits(model)
 
     def extract(self, text: str) -> str:
+        return self.extract_batch([text])[0]
+
+    def extract_batch(self, samples: List[str], batch_size: int = 32) -> List[str]:
+        """
+        Predict relations for many marked samples.
+        Samples are sorted by length and each batch is padded only to its longest member.
+        :param samples: texts with <e1>...</e1> and <e2>...</e2> markers
+        :param batch_size: number of samples in one forward pass
+        :return: relation label for every sample, in the input order
+        """
+        return [label for label, _ in self._labels_with_confidence(self.predict_logits(samples, batch_size))]
+
+    def extract_with_confidence(self, samples: List[str], batch_size: int = 32) -> List[Tuple[str, float]]:
+        """
+        Predict relations for many marked samples together with their softmax probabilities
+        :return: (relation label, probability of the label) for every sample, in the input order
+        """
+        return self._labels_with_confidence(self.predict_logits(samples, batch_size))
+
+    def extract_pairs_with_confidence(self, tokens: List[str], pairs: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+                                      batch_size: int = 32) -> List[Tuple[str, float]]:
+        """
+        Predict relations for many entity pairs of one tokenized sentence together with their softmax probabilities
+        (see extract_pairs)
+        """
+        if not pairs:
+            return []
+        return self._labels_with_confidence(self._predict_pairs_logits(tokens, pairs, batch_size))
+
+    def predict_logits(self, samples: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Predict relation logits for many marked samples
+        :return: logits of shape [n_samples, n_labels], in the input order. Rows of samples whose entities
+        do not fit into max_seq_len are NaN, such samples are predicted as NO-RELATION with confidence 0
+        """
+        return self._predict_logits([self._try_convert(self.convert, sample) for sample in samples], batch_size)
+
+    def convert(self, sample: str) -> dict:
+        """
+        Convert a marked sample into unpadded features
+        """
+        return self._vectorizer.convert(sample, args=self._model_args, add_sep_token=self._model_args['add_sep_token'])
+
+    def extract_pairs(self, tokens: List[str], pairs: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+                      batch_size: int = 32) -> List[str]:
+        """
+        Predict relations for many entity pairs of one tokenized sentence.
+        The sentence is split into word pieces once, markers are inserted on the piece level for every pair.
+        :param tokens: sentence tokens
+        :param pairs: (e1 span, e2 span) pairs, spans are (start, end) token spans, end is exclusive
+        :param batch_size: number of samples in one forward pass
+        :return: relation label for every pair, in the input order
+        """
+        if not pairs:
+            return []
+        logits = self._predict_pairs_logits(tokens, pairs, batch_size)
+        return [label for label, _ in self._labels_with_confidence(logits)]
+
+    def _predict_pairs_logits(self, tokens: List[str], pairs: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+                              batch_size: int) -> np.ndarray:
+        words_pieces = self._vectorizer.split_words(tokens)
+        features = [
+            self._try_convert(self._vectorizer.convert_pieces, words_pieces, e1_span, e2_span, args=self._model_args,
+                              add_sep_token=self._model_args['add_sep_token'])
+            for e1_span, e2_span in pairs
+        ]
+        return self._predict_logits(features, batch_size)
+
+    @staticmethod
+    def _try_convert(convert: Callable[..., dict], *args, **kwargs) -> Optional[dict]:
+        """
+        Convert one sample, a sample whose entities do not fit into max_seq_len is skipped
+        :return: features or None
+        """
+        try:
+            return convert(*args, **kwargs)
+        except ValueError:
+            return None
+
+    @classmethod
+    def _labels_with_confidence(cls, logits: np.ndarray) -> List[Tuple[str, float]]:
+        # softmax over labels, shifted by the max logit for numerical stability
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        labels = []
+        for prob in probs:
+            if np.isnan(prob).any():
+                # the sample was not encoded (see _try_convert)
+                labels.append((cls.NO_RELATION, 0.0))
+            else:
+                pred = int(np.argmax(prob))
+                labels.append((RE_LABELS[pred], float(prob[pred])))
+        return labels
+
+    def _predict_logits(self, features: List[dict], batch_size: int) -> np.ndarray:
+        """
+        Run the model over features sorted by length, None features are skipped
+        :return: logits of shape [n_samples, n_labels], in the input order, NaN for skipped features
+        """
+        logits = np.full((len(features), len(RE_LABELS)), np.nan, dtype=np.float32)
+        order = sorted((i for i in range(len(features)) if features[i] is not None),
+                       key=lambda i: len(features[i]['input_ids']))
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start: start + batch_size]
+            input_ids, attention_mask, token_type_ids, e1_mask, e2_mask = self._vectorizer.pad_batch(
+                [features[i] for i in batch_indices], max_len=self._pad_len
+            )
 
-        # Convert text into features
-        input_ids, attention_mask, token_type_ids, e1_mask, e2_mask = self._vectorizer.vectorize(text, args=self._model_args, add_sep_token=['add_sep_token'])
-
-        # Predict
-        with torch.no_grad():
-            inputs = {
-                "input_ids": input_ids,
-                "attention_mask": attention_mask,
-                "token_type_ids": token_type_ids,
-                "labels": None,
-                "e1_mask": e1_mask,
-                "e2_mask": e2_mask,
-            }
-            outputs = self._model(**inputs)
-            logits = outputs[0]
-            pred = logits.detach().cpu().numpy()
-
-        pred = np.argmax(pred, axis=1)
-        pred = RE_LABELS[int(pred)]
-
-        return pred
+            # Predict
+            with torch.no_grad():
+                outputs = self._model(
+                    input_ids.to(self._device),
+                    attention_mask.to(self._device),
+                    token_type_ids.to(self._device),
+                    e1_mask.to(self._device),
+                    e2_mask.to(self._device),
+                )
+                logits[batch_indices] = outputs.detach().cpu().numpy()
+        return logits
@@ -0,0 +1,80 @@
+""" CPU-oriented backends for the RBERT relation model: dynamic int8 quantization of the linear layers and
+TorchScript tracing of the whole forward pass, including the entity-averaging head.
+
+A parity report against the float model on sample inputs is printed by
+
+    python -m relation_extractor.dl_relation_extractor.optimized_model
+"""
+from typing import Dict, List, Tuple
+
+import torch
+import torch.nn as nn
+
+# samples on which the optimized models are compared with the float model
+PARITY_SAMPLES = [
+    '<e1>Научные вычисления</e1> включают <e2>прикладную математику</e2> и вычислительную технику.',
+    'Для разработки <e1>системы</e1> использовался <e2>язык программирования Python</e2>.',
+    'В работе предложен <e1>метод сжатия данных</e1> на основе <e2>свёрточных нейронных сетей</e2>.',
+    '<e2>Морфологический анализ</e2> является частью <e1>обработки естественного языка</e1>.',
+]
+
+
+class RBERTLogits(nn.Module):
+    """ Wraps RBERT so that it takes positional tensors and returns only logits, which makes it traceable """
+
+    def __init__(self, model: nn.Module):
+        super(RBERTLogits, self).__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids, e1_mask, e2_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids,
+                          labels=None, e1_mask=e1_mask, e2_mask=e2_mask)[0]
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """
+    Apply dynamic int8 quantization to all linear layers (BERT encoder, pooler and RBERT heads).
+    Quantized models run on CPU only.
+    """
+    model.to('cpu')
+    return torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def trace_model(model: nn.Module, example_inputs: Tuple[torch.Tensor, ...]) -> torch.jit.ScriptModule:
+    """
+    Trace the model into TorchScript
+    :param model: RBERT model, float or quantized
+    :param example_inputs: input_ids, attention_mask, token_type_ids, e1_mask, e2_mask of one padded batch
+    :return: traced module taking the same positional tensors and returning logits
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(RBERTLogits(model).eval(), example_inputs, strict=False)
+    return torch.jit.freeze(traced)
+
+
+def check_parity(reference_model, model, samples: List[str] = None, batch_size: int = 32) -> Dict[str, float]:
+    """
+    Compare relation predictions of two extractors on marked samples
+    :param reference_model: reference (float) DLRelationExtractor
+    :param model: DLRelationExtractor with an optimized backend
+    :param samples: marked samples, PARITY_SAMPLES by default
+    :param batch_size: number of samples in one forward pass
+    :return: max absolute logit difference and share of samples with the same predicted label
+    """
+    samples = samples or PARITY_SAMPLES
+    reference_logits = reference_model.predict_logits(samples, batch_size)
+    logits = model.predict_logits(samples, batch_size)
+    return {
+        'max_abs_diff': float(abs(reference_logits - logits).max(initial=0.0)),
+        'label_agreement': float((reference_logits.argmax(axis=1) == logits.argmax(axis=1)).mean()),
+    }
+
+
+if __name__ == '__main__':
+    from relation_extractor.dl_relation_extractor.dl_relation_extractor import DLRelationExtractor
+
+    float_extractor = DLRelationExtractor()
+    for backend in ('quantized', 'torchscript', 'quantized_torchscript'):
+        report = check_parity(float_extractor, DLRelationExtractor(backend=backend))
+        print(f'{backend}: max abs logit diff: {report["max_abs_diff"]:.5f}, '
+              f'label agreement: {report["label_agreement"]:.4f}')
@@ -0,0 +1,59 @@
+import unittest
+
+import torch
+
+from utils.constants import RE_LABELS
+from relation_extractor.dl_relation_extractor.dl_relation_extractor import DLRelationExtractor
+from relation_extractor.dl_relation_extractor.vectorizer import Vectorizer
+
+MAX_SEQ_LEN = 128
+
+
+class ConstantModel:
+    """ Predicts USAGE for every sample and checks that entity masks are inside the sequence """
+
+    def __call__(self, input_ids, attention_mask, token_type_ids, e1_mask, e2_mask):
+        assert input_ids.shape[1] <= MAX_SEQ_LEN
+        assert e1_mask.sum(dim=1).min() > 0 and e2_mask.sum(dim=1).min() > 0
+        logits = torch.zeros((input_ids.shape[0], len(RE_LABELS)))
+        logits[:, RE_LABELS.index('USAGE')] = 1.0
+        return logits
+
+
+class TestDLRelationExtractor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # the model weights are not needed: the extractor is assembled around a constant model
+        cls._extractor = DLRelationExtractor.__new__(DLRelationExtractor)
+        cls._extractor._vectorizer = Vectorizer()
+        cls._extractor._model_args = {'max_seq_len': MAX_SEQ_LEN, 'add_sep_token': True}
+        cls._extractor._device = 'cpu'
+        cls._extractor._pad_len = None
+        cls._extractor._model = ConstantModel()
+
+    def test_far_pair_in_batch(self):
+        samples = [
+            '<e1> b </e1> c <e2> d </e2> e',
+            # the closing marker of e2 is past 128 word pieces
+            '<e1> b </e1> ' + ' '.join(['a'] * 200) + ' <e2> d </e2> e',
+            # entity1 alone does not fit into max_seq_len
+            '<e1> ' + ' '.join(['b'] * 200) + ' </e1> c <e2> d </e2>',
+            'a <e2> d </e2> c <e1> b </e1>',
+        ]
+        predictions = self._extractor.extract_with_confidence(samples, batch_size=2)
+        self.assertEqual(['USAGE', 'USAGE', 'NO-RELATION', 'USAGE'], [label for label, _ in predictions])
+        self.assertEqual(0.0, predictions[2][1])
+        self.assertEqual(['USAGE', 'USAGE', 'NO-RELATION', 'USAGE'], self._extractor.extract_batch(samples))
+
+    def test_far_pairs_of_sentence(self):
+        tokens = ['b', 'c', 'd'] + ['a'] * 200 + ['e'] + ['f'] * 200
+        pairs = [((0, 1), (2, 3)), ((0, 1), (203, 204)), ((2, 3), (204, 404)), ((203, 204), (0, 1))]
+        predictions = self._extractor.extract_pairs_with_confidence(tokens, pairs, batch_size=2)
+        self.assertEqual([('NO-RELATION', 0.0)], predictions[2:3])
+        self.assertEqual(['USAGE', 'USAGE', 'NO-RELATION', 'USAGE'], [label for label, _ in predictions])
+        self.assertEqual(['USAGE', 'USAGE', 'NO-RELATION', 'USAGE'], self._extractor.extract_pairs(tokens, pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()
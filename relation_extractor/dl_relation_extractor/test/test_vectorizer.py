@@ -0,0 +1,44 @@
+import unittest
+
+from relation_extractor.dl_relation_extractor.vectorizer import Vectorizer
+
+
+class TestVectorizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._vectorizer = Vectorizer()
+        cls._cropping_vectorizer = Vectorizer(crop_window=2)
+
+    def _sample(self, n_words_before: int) -> str:
+        return ' '.join(['a'] * n_words_before) + ' <e1> b </e1> c <e2> d </e2> e'
+
+    def test_closing_marker_truncated_by_sep(self):
+        # "a" * 3, $, b, $, c, #, d, # -> [CLS] + 10 tokens: the closing marker of e2 is at position 10
+        args = {'max_seq_len': 11}
+        features = self._vectorizer.convert(self._sample(3), args, add_sep_token=False)
+        self.assertEqual(10, features['e22_p'])
+        # [SEP] would cut off the closing marker, so the sentence is cropped around the pair instead
+        features = self._vectorizer.convert(self._sample(3), args, add_sep_token=True)
+        self.assertEqual(['[CLS]', 'a', '$', 'b', '$', 'c', '#', 'd', '#', 'e', '[SEP]'],
+                         self._vectorizer._tokenizer.convert_ids_to_tokens(features['input_ids']))
+        self.assertEqual(8, features['e22_p'])
+        features = self._vectorizer.convert(self._sample(2), args, add_sep_token=True)
+        self.assertEqual(9, features['e22_p'])
+        self.assertEqual('[SEP]', self._vectorizer._tokenizer.convert_ids_to_tokens(features['input_ids'][-1]))
+
+    def test_entities_do_not_fit(self):
+        sample = '<e1> ' + ' '.join(['b'] * 10) + ' </e1> c <e2> d </e2>'
+        with self.assertRaises(ValueError):
+            self._vectorizer.convert(sample, {'max_seq_len': 11}, add_sep_token=True)
+
+    def test_crop(self):
+        args = {'max_seq_len': 12}
+        features = self._cropping_vectorizer.convert(self._sample(20), args, add_sep_token=True)
+        self.assertEqual(['[CLS]', 'a', 'a', '$', 'b', '$', 'c', '#', 'd', '#', 'e', '[SEP]'],
+                         self._cropping_vectorizer._tokenizer.convert_ids_to_tokens(features['input_ids']))
+        self.assertEqual((3, 5, 7, 9), (features['e11_p'], features['e12_p'], features['e21_p'], features['e22_p']))
+
+
+if __name__ == '__main__':
+    unittest.main()
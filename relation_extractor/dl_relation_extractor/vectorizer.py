@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional, Tuple
+
 import torch
 from transformers import BertTokenizer
 from utils.constants import ADDITIONAL_SPECIAL_TOKENS
@@ -5,16 +7,148 @@ from utils.constants import ADDITIONAL_SPECIAL_TOKENS
 
 class Vectorizer:
 
-    def __init__(self):
+    def __init__(self, crop_window: Optional[int] = None):
+        """
+        :param crop_window: if set, only this number of word pieces is kept on each side of the entity pair,
+        so the sequence length depends on the distance between entities rather than on the sentence length
+        """
+        self._crop_window = crop_window
         self._tokenizer = BertTokenizer.from_pretrained('bert-base-multilingual-cased')
         self._tokenizer.add_special_tokens({"additional_special_tokens": ADDITIONAL_SPECIAL_TOKENS})
 
     def vectorize(self, text, args, cls_token="[CLS]", cls_token_segment_id=0, sep_token="[SEP]", pad_token_id=0,
                   pad_token_segment_id=0, sequence_a_segment_id=0, add_sep_token=False, mask_padding_with_zero=True):
-        # Setting based on the current model type
-
+        features = self.convert(text, args, cls_token=cls_token, cls_token_segment_id=cls_token_segment_id,
+                                sep_token=sep_token, sequence_a_segment_id=sequence_a_segment_id,
+                                add_sep_token=add_sep_token, mask_padding_with_zero=mask_padding_with_zero)
+        # Zero-pad up to the sequence length.
+        return self.pad_batch([features], max_len=args['max_seq_len'], pad_token_id=pad_token_id,
+                              pad_token_segment_id=pad_token_segment_id,
+                              mask_padding_with_zero=mask_padding_with_zero)
+
+    def convert(self, text, args, cls_token="[CLS]", cls_token_segment_id=0, sep_token="[SEP]",
+                sequence_a_segment_id=0, add_sep_token=False, mask_padding_with_zero=True) -> Dict[str, List[int]]:
+        """
+        Convert a sample with <e1>...</e1> and <e2>...</e2> markers into unpadded features
+        :return: dict with input_ids, attention_mask, token_type_ids and e1/e2 start and end positions
+        """
         tokens = self._tokenizer.tokenize(text)
+        return self._convert_tokens(tokens, args, cls_token=cls_token, cls_token_segment_id=cls_token_segment_id,
+                                    sep_token=sep_token, sequence_a_segment_id=sequence_a_segment_id,
+                                    add_sep_token=add_sep_token, mask_padding_with_zero=mask_padding_with_zero)
+
+    def split_words(self, words: List[str]) -> List[List[str]]:
+        """
+        Split every word of a tokenized sentence into word pieces
+        """
+        return [self._tokenizer.tokenize(word) for word in words]
+
+    def convert_pieces(self, words_pieces: List[List[str]], e1_span: Tuple[int, int], e2_span: Tuple[int, int], args,
+                       add_sep_token=False) -> Dict[str, List[int]]:
+        """
+        Convert a tokenized sentence into unpadded features, inserting entity markers around two word spans.
+        Words are not re-tokenized, so one split_words call serves all pairs of the sentence.
+        :param words_pieces: word pieces of every word (see split_words)
+        :param e1_span: (start, end) word span of entity1, end is exclusive
+        :param e2_span: (start, end) word span of entity2, end is exclusive
+        """
+        markers = {
+            e1_span[0]: ["<e1>"], e2_span[0]: ["<e2>"],
+        }
+        closing_markers = {
+            e1_span[1]: ["</e1>"], e2_span[1]: ["</e2>"],
+        }
+        tokens = []
+        for i in range(len(words_pieces) + 1):
+            tokens.extend(closing_markers.get(i, []))
+            if i < len(words_pieces):
+                tokens.extend(markers.get(i, []))
+                tokens.extend(words_pieces[i])
+        return self._convert_tokens(tokens, args, add_sep_token=add_sep_token)
+
+    def pad_batch(self, features: List[Dict[str, List[int]]], max_len=None, pad_token_id=0, pad_token_segment_id=0,
+                  mask_padding_with_zero=True) -> Tuple[torch.Tensor, ...]:
+        """
+        Pad a batch of features to a common length and convert them to tensors
+        :param features: features produced by convert
+        :param max_len: length to pad to, by default the length of the longest sample in the batch
+        :return: input_ids, attention_mask, token_type_ids, e1_mask, e2_mask tensors of shape [batch_size, max_len]
+        """
+        if max_len is None:
+            max_len = max(len(sample['input_ids']) for sample in features)
+
+        batch = {'input_ids': [], 'attention_mask': [], 'token_type_ids': [], 'e1_mask': [], 'e2_mask': []}
+        for sample in features:
+            padding_length = max_len - len(sample['input_ids'])
+            batch['input_ids'].append(sample['input_ids'] + ([pad_token_id] * padding_length))
+            batch['attention_mask'].append(
+                sample['attention_mask'] + ([0 if mask_padding_with_zero else 1] * padding_length)
+            )
+            batch['token_type_ids'].append(sample['token_type_ids'] + ([pad_token_segment_id] * padding_length))
+
+            # e1 mask, e2 mask
+            e1_mask = [0] * max_len
+            e2_mask = [0] * max_len
+            for i in range(sample['e11_p'], sample['e12_p'] + 1):
+                e1_mask[i] = 1
+            for i in range(sample['e21_p'], sample['e22_p'] + 1):
+                e2_mask[i] = 1
+            batch['e1_mask'].append(e1_mask)
+            batch['e2_mask'].append(e2_mask)
+
+        # Convert to Tensors
+        return tuple(
+            torch.tensor(batch[name], dtype=torch.long)
+            for name in ('input_ids', 'attention_mask', 'token_type_ids', 'e1_mask', 'e2_mask')
+        )
+
+    @staticmethod
+    def _crop_tokens(tokens: List[str], max_len: int, window: int) -> List[str]:
+        """
+        Keep window word pieces around the entity pair and everything between the entities.
+        If the pair itself does not fit into max_len, the middle of the gap between the entities is cut out,
+        the entities and their markers are always kept
+        :param tokens: word pieces with <e1>...</e1> and <e2>...</e2> markers
+        :param max_len: maximum number of word pieces after cropping
+        :param window: maximum number of word pieces kept on each side of the entity pair
+        """
+        e1_start, e1_end = tokens.index("<e1>"), tokens.index("</e1>")
+        e2_start, e2_end = tokens.index("<e2>"), tokens.index("</e2>")
+        pair_start, pair_end = min(e1_start, e2_start), max(e1_end, e2_end) + 1
+
+        excess = (pair_end - pair_start) - max_len
+        if excess > 0:
+            # the gap between the closing marker of the left entity and the opening marker of the right one
+            gap_start, gap_end = (e1_end + 1, e2_start) if e1_start < e2_start else (e2_end + 1, e1_start)
+            if gap_end - gap_start < excess:
+                raise ValueError('Entities do not fit into max_seq_len')
+            cut_start = gap_start + (gap_end - gap_start - excess) // 2
+            tokens = tokens[:cut_start] + tokens[cut_start + excess:]
+            pair_end -= excess
+
+        remaining = max_len - (pair_end - pair_start)
+        left = min(window, pair_start)
+        right = min(window, len(tokens) - pair_end)
+        if left + right > remaining:
+            left = min(left, max(remaining // 2, remaining - right))
+            right = remaining - left
+        return tokens[pair_start - left: pair_end + right]
+
+    def _convert_tokens(self, tokens, args, cls_token="[CLS]", cls_token_segment_id=0, sep_token="[SEP]",
+                        sequence_a_segment_id=0, add_sep_token=False, mask_padding_with_zero=True):
+        # Account for [CLS] and [SEP] with "- 2" and with "- 3" for RoBERTa.
+        if add_sep_token:
+            special_tokens_count = 2
+        else:
+            special_tokens_count = 1
+        max_len = args['max_seq_len'] - special_tokens_count
+        if self._crop_window is not None:
+            tokens = self._crop_tokens(tokens, max_len, self._crop_window)
+        elif len(tokens) > max_len and max(tokens.index("</e1>"), tokens.index("</e2>")) >= max_len:
+            # truncation would cut off an entity marker, so the sentence is cropped around the pair instead
+            tokens = self._crop_tokens(tokens, max_len, max_len)
 
+        # Setting based on the current model type
         e11_p = tokens.index("<e1>")  # the start position of entity1
         e12_p = tokens.index("</e1>")  # the end position of entity1
         e21_p = tokens.index("<e2>")  # the start position of entity2
@@ -32,13 +166,11 @@ class Vectorizer:
         e21_p += 1
         e22_p += 1
 
-        # Account for [CLS] and [SEP] with "- 2" and with "- 3" for RoBERTa.
-        if add_sep_token:
-            special_tokens_count = 2
-        else:
-            special_tokens_count = 1
-        if len(tokens) > args['max_seq_len'] - special_tokens_count:
-            tokens = tokens[: (args['max_seq_len'] - special_tokens_count)]
+        if len(tokens) > max_len:
+            tokens = tokens[:max_len]
+        # positions are shifted by [CLS], so a marker kept after truncation is at most at len(tokens)
+        if max(e12_p, e22_p) > len(tokens):
+            raise ValueError('Entity marker is beyond max_seq_len')
 
         # Add [SEP] token
         if add_sep_token:
@@ -54,26 +186,12 @@ class Vectorizer:
         # The mask has 1 for real tokens and 0 for padding tokens. Only real tokens are attended to.
         attention_mask = [1 if mask_padding_with_zero else 0] * len(input_ids)
 
-        # Zero-pad up to the sequence length.
-        padding_length = args['max_seq_len'] - len(input_ids)
-        input_ids = input_ids + ([pad_token_id] * padding_length)
-        attention_mask = attention_mask + ([0 if mask_padding_with_zero else 1] * padding_length)
-        token_type_ids = token_type_ids + ([pad_token_segment_id] * padding_length)
-
-        # e1 mask, e2 mask
-        e1_mask = [0] * len(attention_mask)
-        e2_mask = [0] * len(attention_mask)
-
-        for i in range(e11_p, e12_p + 1):
-            e1_mask[i] = 1
-        for i in range(e21_p, e22_p + 1):
-            e2_mask[i] = 1
-
-        # Convert to Tensors
-        input_ids = torch.tensor([input_ids], dtype=torch.long)
-        attention_mask = torch.tensor([attention_mask], dtype=torch.long)
-        token_type_ids = torch.tensor([token_type_ids], dtype=torch.long)
-        e1_mask = torch.tensor([e1_mask], dtype=torch.long)
-        e2_mask = torch.tensor([e2_mask], dtype=torch.long)
-
-        return input_ids, attention_mask, token_type_ids, e1_mask, e2_mask
+        return {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'token_type_ids': token_type_ids,
+            'e11_p': e11_p,
+            'e12_p': e12_p,
+            'e21_p': e21_p,
+            'e22_p': e22_p,
+        }
@@ -0,0 +1,42 @@
+from typing import List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+
+class PairGenerator:
+    """ Enumerates candidate term pairs in a sentence for relation extraction """
+
+    def __init__(self, max_distance: Optional[int] = None, both_directions: bool = False,
+                 max_pairs: Optional[int] = None):
+        """
+        :param max_distance: maximum number of tokens between two terms, pairs of more distant terms are skipped
+        :param both_directions: generate (e2, e1) in addition to (e1, e2), where e1 is the left term
+        :param max_pairs: maximum number of pairs per sentence, the nearest pairs are kept
+        """
+        self._max_distance = max_distance
+        self._both_directions = both_directions
+        self._max_pairs = max_pairs
+
+    def generate(self, term_spans: List[Span]) -> List[Tuple[Span, Span]]:
+        """ Enumerate candidate pairs of non-overlapping terms
+
+        :param term_spans: term spans (start, end), end is exclusive
+        :return: pairs (e1 span, e2 span) sorted by the distance between terms
+        """
+        spans = sorted(term_spans)
+        candidates = []
+        for i, left in enumerate(spans):
+            for right in spans[i + 1:]:
+                distance = right[0] - left[1]
+                if distance < 0:
+                    continue
+                # spans are sorted by start, so all following terms are even more distant
+                if self._max_distance is not None and distance > self._max_distance:
+                    break
+                candidates.append((distance, left, right))
+                if self._both_directions:
+                    candidates.append((distance, right, left))
+        candidates.sort(key=lambda candidate: candidate[0])
+        if self._max_pairs is not None:
+            candidates = candidates[:self._max_pairs]
+        return [(e1, e2) for _, e1, e2 in candidates]
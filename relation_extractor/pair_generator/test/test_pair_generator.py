@@ -0,0 +1,26 @@
+import unittest
+
+from relation_extractor.pair_generator.pair_generator import PairGenerator
+
+
+class TestPairGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self._spans = [(7, 8), (0, 2), (3, 5), (4, 6)]
+
+    def test_generate(self):
+        pairs = PairGenerator().generate(self._spans)
+        self.assertEqual([((0, 2), (3, 5)), ((4, 6), (7, 8)), ((0, 2), (4, 6)), ((3, 5), (7, 8)),
+                          ((0, 2), (7, 8))], pairs)
+
+    def test_max_distance(self):
+        pairs = PairGenerator(max_distance=1).generate(self._spans)
+        self.assertEqual([((0, 2), (3, 5)), ((4, 6), (7, 8))], pairs)
+
+    def test_both_directions_and_max_pairs(self):
+        pairs = PairGenerator(both_directions=True, max_pairs=3).generate(self._spans)
+        self.assertEqual([((0, 2), (3, 5)), ((3, 5), (0, 2)), ((4, 6), (7, 8))], pairs)
+
+
+if __name__ == '__main__':
+    unittest.main()
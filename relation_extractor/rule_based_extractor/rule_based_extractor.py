@@ -1,9 +1,9 @@
 import os
 import json
-from typing import Dict, List
-
-import pymorphy2
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from utils.morphology import morph
+from utils.token_trie import TokenTrie
 from utils.utilities import tokenize
 from utils.paths import RELATION_EXTRACTOR_PATH
 
@@ -16,12 +16,27 @@ class RuleBasedExtractor:
 
     RULE_BASED_PATH = os.path.join(RELATION_EXTRACTOR_PATH, 'rule_based_extractor')
 
-    def __init__(self):
-        self._morph = pymorphy2.MorphAnalyzer()
+    def __init__(self, trusted_patterns: Optional[Iterable[str]] = None):
+        """
+        :param trusted_patterns: high-precision patterns (see is_trusted). When several TOOL patterns match,
+        a trusted one is reported
+        """
+        self._morph = morph
+        self._trusted_patterns = {self._lemmatize(pattern) for pattern in trusted_patterns or []}
         self._pattern2relation = self._load_patterns(os.path.join(self.RULE_BASED_PATH, 'patterns.json'))
         self._one_word_pattern2relation = self._load_patterns(os.path.join(
             self.RULE_BASED_PATH, 'one_word_patterns.json')
         )
+        self._patterns = list(self._pattern2relation)
+        self._patterns_trie, self._relations = self._compile_patterns(self._pattern2relation)
+        self._one_word_patterns = list(self._one_word_pattern2relation)
+        self._one_word_patterns_trie, self._one_word_relations = self._compile_patterns(
+            self._one_word_pattern2relation
+        )
+
+    def is_trusted(self, pattern: Optional[str]) -> bool:
+        """ Check whether a reported (lemmatized) pattern is one of the trusted patterns """
+        return pattern in self._trusted_patterns
 
     def _extract_relations(self, context: str) -> str:
         """ Extract relation based on context between two entities
@@ -29,16 +44,27 @@ class RuleBasedExtractor:
         :param context: text between two entities
         :return: relation type
         """
-        relation = self.NO_RELATION
+        return self._match_relation(context)[0]
+
+    def _match_relation(self, context: str) -> Tuple[str, Optional[str]]:
+        """ Extract relation based on context between two entities
+
+        :param context: text between two entities
+        :return: relation type and the lemmatized pattern that defined it (None if no pattern matched)
+        """
         context = self._lemmatize(context)
         tokens = context.split(' ')
         if len(tokens) > self.MAX_CONTEXT_LENGTH:
-            return relation
+            return self.NO_RELATION, None
         if len(tokens) <= self.MIN_CONTEXT_LENGTH:
-            relation = self._search_one_word_patterns(tokens)
-        if relation == self.NO_RELATION:
-            relation = self._search(self._pattern2relation, context)
-        return relation
+            order = self._search(self._one_word_patterns_trie, self._one_word_relations, self._one_word_patterns,
+                                 tokens)
+            if order >= 0:
+                return self._one_word_relations[order], self._one_word_patterns[order]
+        order = self._search(self._patterns_trie, self._relations, self._patterns, tokens)
+        if order >= 0:
+            return self._relations[order], self._patterns[order]
+        return self.NO_RELATION, None
 
     def _load_patterns(self, path: str) -> Dict[str, str]:
         with open(path, 'r') as f:
@@ -50,24 +76,41 @@ class RuleBasedExtractor:
                 pattern2relation[phrase] = relation
         return pattern2relation
 
-    def _search(self, pattern2relation: Dict[str, str], text: str) -> str:
-        relation = self.NO_RELATION
-        for pattern, rel in pattern2relation.items():
-            if rel == "TOOL":
-                if pattern in text:
-                    relation = rel
-                    break
-            else:
-                if pattern in text:
-                    relation = rel
-        return relation
-
-    def _search_one_word_patterns(self, tokens: List[str]) -> str:
-        relation = self.NO_RELATION
-        for pattern, rel in self._one_word_pattern2relation.items():
-            if pattern in tokens:
-                relation = rel
-        return relation
+    def _compile_patterns(self, pattern2relation: Dict[str, str]) -> Tuple[TokenTrie, List[str]]:
+        """ Compile lemmatized patterns into a token trie
+
+        :param pattern2relation: lemmatized pattern -> relation
+        :return: trie with the pattern order as value and the relation of every pattern in this order
+        """
+        trie = TokenTrie()
+        relations = []
+        for order, (pattern, relation) in enumerate(pattern2relation.items()):
+            trie.add(pattern.split(' '), order)
+            relations.append(relation)
+        return trie, relations
+
+    def _search(self, trie: TokenTrie, relations: List[str], patterns: List[str], tokens: List[str]) -> int:
+        """ Find all pattern matches in one pass over the tokens. TOOL wins if any of its patterns matches: the first
+        trusted TOOL pattern in the patterns order, otherwise the first TOOL pattern in the patterns order. Without
+        TOOL matches the last matched pattern in the patterns order is returned
+
+        :param trie: compiled patterns (see _compile_patterns)
+        :param relations: relation of every pattern
+        :param patterns: lemmatized patterns in the patterns order
+        :param tokens: lemmatized context tokens
+        :return: order of the winning pattern, -1 if nothing matched
+        """
+        last_match = -1
+        tool_match = trusted_tool_match = len(patterns)
+        for _, _, order in trie.search_all(tokens):
+            if relations[order] == "TOOL":
+                tool_match = min(tool_match, order)
+                if patterns[order] in self._trusted_patterns:
+                    trusted_tool_match = min(trusted_tool_match, order)
+            last_match = max(last_match, order)
+        if trusted_tool_match < len(patterns):
+            return trusted_tool_match
+        return tool_match if tool_match < len(patterns) else last_match
 
     def _lemmatize(self, text: str) -> str:
         tokens = tokenize(text.lower())
@@ -77,6 +120,14 @@ class RuleBasedExtractor:
         return ' '.join(lemmas)
 
     def predict_rule_based(self, sample: str) -> str:
+        return self.match_rule_based(sample)[0]
+
+    def match_rule_based(self, sample: str) -> Tuple[str, Optional[str]]:
+        """ Predict relation for a marked sample
+
+        :param sample: text with <e1>...</e1> and <e2>...</e2> markers
+        :return: relation type and the lemmatized pattern that defined it (None if no pattern matched)
+        """
         sample = sample.replace('<e1>', '<e1> ')
         sample = sample.replace('<e2>', '<e2> ')
         sample = sample.replace('</e1>', ' </e1>')
@@ -92,6 +143,23 @@ class RuleBasedExtractor:
         else:
             context = tokens[obj_end + 2: subj_start - 1]
 
-        rule_based_pred = self._extract_relations(' '.join(context))
+        return self._match_relation(' '.join(context))
+
+    def predict_from_tokens(self, tokens: List[str], e1_span: Tuple[int, int], e2_span: Tuple[int, int]) -> str:
+        return self.match_from_tokens(tokens, e1_span, e2_span)[0]
+
+    def match_from_tokens(
+            self, tokens: List[str], e1_span: Tuple[int, int], e2_span: Tuple[int, int]
+    ) -> Tuple[str, Optional[str]]:
+        """ Predict relation for two entities of a tokenized sentence without building a marked sample
 
-        return rule_based_pred
+        :param tokens: sentence tokens
+        :param e1_span: (start, end) token span of entity1, end is exclusive
+        :param e2_span: (start, end) token span of entity2, end is exclusive
+        :return: relation type and the lemmatized pattern that defined it (None if no pattern matched)
+        """
+        if e1_span[1] <= e2_span[0]:
+            context = tokens[e1_span[1]: e2_span[0]]
+        else:
+            context = tokens[e2_span[1]: e1_span[0]]
+        return self._match_relation(' '.join(context))
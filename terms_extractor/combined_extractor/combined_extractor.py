@@ -1,25 +1,90 @@
-from typing import List, Tuple, Union
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
 
 from utils.constants import Tags
 from utils.utilities import validate_sequence
 from terms_extractor.base_extractor import BaseExtractor
+from terms_extractor.document import Document
 from terms_extractor.dl_extractor.dl_extractor import DLExtractor
 from terms_extractor.dict_extractor.dict_extractor import DictExtractor
 
+SEQUENTIAL = 'sequential'
+THREAD = 'thread'
+PROCESS = 'process'
+
+# словарный извлекатель в процессе-обработчике (режим PROCESS)
+_process_dict_extractor: Optional[DictExtractor] = None
+
+
+def _init_process_dict_extractor():
+    global _process_dict_extractor
+    _process_dict_extractor = DictExtractor()
+
+
+def _extract_in_process(tokens: List[str]) -> List[Tuple[str, str]]:
+    return _process_dict_extractor.extract(tokens)
+
 
 class CombinedExtractor(BaseExtractor):
 
-    def __init__(self):
-        self._dict_extractor = DictExtractor()
+    def __init__(self, execution_mode: str = SEQUENTIAL, max_workers: int = 1):
+        """
+        :param execution_mode: Как выполняются словарная и нейросетевая ветки:
+        'sequential' - последовательно,
+        'thread' - словарная ветка выполняется в пуле потоков одновременно с нейросетевой (модель отпускает GIL),
+        'process' - словарная ветка выполняется в пуле процессов
+        :param max_workers: Количество потоков или процессов для словарной ветки
+
+        В режимах 'thread' и 'process' пул нужно остановить вызовом close() или использовать извлекатель в блоке with
+        """
+        if execution_mode not in (SEQUENTIAL, THREAD, PROCESS):
+            raise ValueError(f'Unknown execution mode: {execution_mode}')
+        self._dict_extractor = None
+        self._executor: Optional[Executor] = None
+        if execution_mode == PROCESS:
+            # процессы запускаются через spawn: fork процесса, в котором уже работают потоки TensorFlow, может
+            # привести к взаимоблокировке, а каждый процесс унаследовал бы память модели
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process_dict_extractor
+            )
+        else:
+            self._dict_extractor = DictExtractor()
+            if execution_mode == THREAD:
+                self._executor = ThreadPoolExecutor(max_workers=max_workers)
         self._dl_extractor = DLExtractor()
 
-    def extract(self, text: Union[str, List[str]]) -> List[Tuple[str, str]]:
-        dict_results = self._dict_extractor.extract(text)
-        dl_results = self._dl_extractor.extract(text)
+    def extract(self, text: Union[str, List[str], Document]) -> List[Tuple[str, str]]:
+        # текст анализируется один раз, токены, леммы и морфологические коды общие для обоих извлекателей
+        document = text if isinstance(text, Document) else Document(text)
+        if self._executor is None:
+            dict_results = self._dict_extractor.extract(document)
+            dl_results = self._dl_extractor.extract(document)
+        else:
+            # словарная ветка выполняется в пуле, пока модель обрабатывает текст в текущем потоке
+            if self._dict_extractor is None:
+                # в другой процесс передаются только токены: документ в это время дополняется нейросетевой веткой
+                dict_future = self._executor.submit(_extract_in_process, document.tokens)
+            else:
+                dict_future = self._executor.submit(self._dict_extractor.extract, document)
+            dl_results = self._dl_extractor.extract(document)
+            dict_results = dict_future.result()
         merged_results = self._merge_results(dict_results, dl_results)
         merged_results = validate_sequence(merged_results)
         return merged_results
 
+    def close(self):
+        """ Останавливает пул потоков или процессов словарной ветки """
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self) -> 'CombinedExtractor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def _merge_results(
             self, dict_results: List[Tuple[str, str]], dl_results: List[Tuple[str, str]]
     ) -> List[Tuple[str, str]]:
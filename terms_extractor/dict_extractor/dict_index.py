@@ -0,0 +1,94 @@
+""" Сборка бинарного индекса словаря терминов для DictExtractor.
+
+Индекс строится один раз (например, при деплое) командой
+
+    python -m terms_extractor.dict_extractor.dict_index
+
+и затем открывается каждым процессом через mmap. Если файлы словаря изменились, индекс пересобирается при загрузке.
+"""
+import os
+import hashlib
+import logging
+from typing import List
+
+from utils.paths import DICT_EXTRACTOR_PATH, DICT_EXTRACTOR_INDEX_PATH
+from utils.token_trie import BaseTokenTrie, CompiledTokenTrie, TokenTrie
+
+TERMS_DIR_NAME = 'ngramm_lemma_terms'
+# название каждого файла соответствует количеству токенов в терминах этого файла
+TERMS_FNAMES = ['1.txt', '2.txt', '3.txt', '4.txt', '5.txt', '6.txt', '7.txt', '8.txt', '9.txt', '10.txt', '11.txt',
+                '12.txt', '13.txt', '14.txt', '20.txt']
+
+
+def get_terms_paths() -> List[str]:
+    files_dir_path = os.path.join(DICT_EXTRACTOR_PATH, TERMS_DIR_NAME)
+    return [os.path.join(files_dir_path, fname) for fname in TERMS_FNAMES]
+
+
+def get_terms_checksum() -> bytes:
+    """ Считает контрольную сумму файлов словаря, по которой определяется, актуален ли индекс
+
+    :return: sha256 от названий и содержимого файлов
+    """
+    checksum = hashlib.sha256()
+    for path in get_terms_paths():
+        checksum.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            checksum.update(f.read())
+    return checksum.digest()
+
+
+def build_kw_tree() -> TokenTrie:
+    """ Строит единое префиксное дерево для терминов из всех словарей. Идентификатор термина - его порядковый номер
+    в словарях
+
+    :return: Префиксное дерево
+    """
+    kw_tree = TokenTrie()
+    term_id = 0
+    for path in get_terms_paths():
+        with open(path, 'r') as f:
+            for ngramm in f.read().split('\n'):
+                if ngramm != '':
+                    kw_tree.add(ngramm.split(), term_id)
+                    term_id += 1
+    return kw_tree
+
+
+def build_index(index_path: str = DICT_EXTRACTOR_INDEX_PATH) -> CompiledTokenTrie:
+    """ Строит бинарный индекс словаря и сохраняет его на диск
+
+    :param index_path: Путь к файлу индекса
+    :return: Загруженный индекс
+    """
+    build_kw_tree().save(index_path, get_terms_checksum())
+    return CompiledTokenTrie(index_path)
+
+
+def load_index(index_path: str = DICT_EXTRACTOR_INDEX_PATH) -> BaseTokenTrie:
+    """ Загружает индекс словаря через mmap. Если индекса нет или он построен по другим версиям файлов словаря,
+    индекс пересобирается. Если сохранить индекс не удалось, используется дерево, построенное в памяти
+
+    :param index_path: Путь к файлу индекса
+    :return: Префиксное дерево терминов
+    """
+    checksum = get_terms_checksum()
+    try:
+        kw_tree = CompiledTokenTrie(index_path)
+        if kw_tree.checksum == checksum:
+            return kw_tree
+        logging.info('Dictionary index is outdated, rebuilding')
+    except (OSError, ValueError):
+        logging.info('Dictionary index is missing or broken, rebuilding')
+    kw_tree = build_kw_tree()
+    try:
+        kw_tree.save(index_path, checksum)
+    except OSError:
+        logging.warning(f'Failed to save dictionary index to {index_path}')
+        return kw_tree
+    return CompiledTokenTrie(index_path)
+
+
+if __name__ == '__main__':
+    index = build_index()
+    print(f'Dictionary index with {len(index)} terms saved to {DICT_EXTRACTOR_INDEX_PATH}')
@@ -1,78 +1,170 @@
-from typing import List, Union
+from typing import List, Tuple, Union
 
 import numpy as np
 
-from utils.constants import Tags, class2label
-from utils.paths import TERMS_EXTRACTOR_WEIGHTS_PATH
-from utils.utilities import validate_sequence, tokenize
+from utils.constants import Tags, class2label, label2class
+from utils.paths import TERMS_EXTRACTOR_WEIGHTS_PATH, TERMS_EXTRACTOR_ONNX_PATH
+from utils.utilities import validate_sequence
 from terms_extractor.base_extractor import BaseExtractor
+from terms_extractor.document import Document
 from terms_extractor.dl_extractor.model import get_model
+from terms_extractor.dl_extractor.onnx_model import OnnxModel
 from terms_extractor.dl_extractor.vectorizer import Vectorizer
 from terms_extractor.dl_extractor.heuristic_validator import HeuristicValidator
 
+# тэг токена выбирается по тэгам его bpe-токенов с приоритетом B-TERM > I-TERM > O
+CLASS_PRIORITY = np.zeros(len(label2class), dtype=np.int8)
+CLASS_PRIORITY[label2class[Tags.I_TERM.value]] = 1
+CLASS_PRIORITY[label2class[Tags.B_TERM.value]] = 2
+PRIORITY_CLASS = np.array(
+    [label2class[Tags.NOT_TERM.value], label2class[Tags.I_TERM.value], label2class[Tags.B_TERM.value]], dtype=np.int8
+)
+
 
 class DLExtractor(BaseExtractor):
 
-    def __init__(self):
-        self._model = get_model()
-        self._model.load_weights(TERMS_EXTRACTOR_WEIGHTS_PATH)
-        self._vectorizer = Vectorizer()
+    def __init__(
+            self, batch_size: int = 32, window_overlap: int = 8, use_fast_tokenizer: bool = False,
+            backend: str = 'keras'
+    ):
+        """
+        :param batch_size: Количество окон, которые обрабатываются моделью за один проход
+        :param window_overlap: Количество токенов, на которое пересекаются соседние окна
+        :param use_fast_tokenizer: Делить текст на bpe-токены быстрым (Rust) токенизатором
+        :param backend: 'keras' - исходная модель, 'onnx' - экспортированная квантизованная модель для CPU
+        (см. terms_extractor.dl_extractor.onnx_model)
+        """
+        if backend == 'keras':
+            self._model = get_model()
+            self._model.load_weights(TERMS_EXTRACTOR_WEIGHTS_PATH)
+        elif backend == 'onnx':
+            self._model = OnnxModel(TERMS_EXTRACTOR_ONNX_PATH)
+        else:
+            raise ValueError(f'Unknown backend: {backend}')
+        self._vectorizer = Vectorizer(use_fast=use_fast_tokenizer)
         self._heuristic_validator = HeuristicValidator()
         self._class2label = class2label
+        self._batch_size = batch_size
+        self._window_overlap = window_overlap
 
-    def extract(self, text: Union[str, List[str]]):
-        if isinstance(text, str):
-            tokens = tokenize(text)
-        else:
-            tokens = text
-        labels = [Tags.NOT_TERM.value for i in range(len(tokens))]
+    def extract(self, text: Union[str, List[str], Document]) -> List[Tuple[str, str]]:
+        return self.extract_batch([text])[0]
+
+    def extract_batch(self, texts: List[Union[str, List[str], Document]]) -> List[List[Tuple[str, str]]]:
+        """ Извлекает термины из нескольких текстов
+
+        :param texts: Список текстов (строк, списков токенов или уже проанализированных документов)
+        :return: Для каждого текста список кортежей (Токен, Тэг)
+        """
+        documents = [text if isinstance(text, Document) else Document(text) for text in texts]
+        results = []
+        for document, (tokens, classes) in zip(documents, self.predict_word_classes(documents)):
+            result = [(token, self._class2label[cls]) for token, cls in zip(tokens, classes.tolist())]
+            result = self._heuristic_validator.validate(result, document.morph_codes)
+            result = validate_sequence(result)
+            results.append(result)
+        return results
+
+    def predict_word_classes(
+            self, texts: List[Union[str, List[str], Document]]
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """ Получает предсказания модели для токенов нескольких текстов (без применения эвристик). Окна всех текстов
+        векторизуются в один тензор и обрабатываются моделью батчами размера batch_size, после чего предсказания
+        распределяются обратно по текстам
 
-        all_bpe_tokens = []
-        all_predictions = []
+        :param texts: Список текстов (строк, списков токенов или уже проанализированных документов)
+        :return: Для каждого текста список токенов и int8-массив их классов (см. utils.constants.class2label)
+        """
+        windows_word_ids = []
+        windows_input_ids = []
+        windows_input_masks = []
+        texts_windows = []
+        documents = [text if isinstance(text, Document) else Document(text) for text in texts]
+        self._split_words(documents)
+        for document in documents:
+            tokens, words_pieces = document.tokens, document.words_pieces
+            windows = self._make_windows(words_pieces)
+            texts_windows.append((tokens, windows, len(windows_word_ids)))
+            for start, end in windows:
+                _, input_ids, input_masks, word_ids = self._vectorizer.vectorize_pieces(words_pieces[start: end])
+                windows_word_ids.append(word_ids)
+                windows_input_ids.append(input_ids)
+                windows_input_masks.append(input_masks)
 
-        n_batches = int(len(tokens) / 50) + 1
-        for i in range(n_batches):
-            start = 50 * i
-            end = 50 * i + 50
-            if end > len(tokens):
-                end = len(tokens)
+        predictions = self._predict(windows_input_ids, windows_input_masks)
 
-            if start == end:
+        results = []
+        for tokens, windows, first_window in texts_windows:
+            classes = np.full(len(tokens), label2class[Tags.NOT_TERM.value], dtype=np.int8)
+            for i, (start, end) in enumerate(windows):
+                window = first_window + i
+                window_classes = self._get_word_classes(windows_word_ids[window], predictions[window], end - start)
+                # токены из пересечения двух окон делятся пополам: каждый берётся из того окна, в котором он
+                # дальше от края
+                own_start = start if i == 0 else (start + windows[i - 1][1]) // 2
+                own_end = end if i == len(windows) - 1 else (windows[i + 1][0] + end) // 2
+                classes[own_start: own_end] = window_classes[own_start - start: own_end - start]
+            results.append((tokens, classes))
+        return results
+
+    def _split_words(self, documents: List[Document]):
+        """ Делит на bpe-токены документы, для которых это ещё не сделано, одним вызовом токенизатора """
+        not_split = [document for document in documents if document.words_pieces is None]
+        texts_pieces = self._vectorizer.split_words_batch([document.tokens for document in not_split])
+        for document, words_pieces in zip(not_split, texts_pieces):
+            document.words_pieces = words_pieces
+
+    def _make_windows(self, words_pieces: List[List[str]]) -> List[Tuple[int, int]]:
+        """ Делит текст на окна так, чтобы каждое окно заполняло модель bpe-токенами, но не превышало max_length.
+        Соседние окна пересекаются на window_overlap токенов. Если один токен длиннее max_length, он попадает в
+        отдельное окно и обрезается
+
+        :param words_pieces: Список bpe-токенов для каждого токена текста
+        :return: Список окон (начало, конец (не включительно))
+        """
+        windows = []
+        start = 0
+        while start < len(words_pieces):
+            end = start
+            n_pieces = 0
+            while end < len(words_pieces) and (
+                    end == start or n_pieces + len(words_pieces[end]) <= self._vectorizer.max_length):
+                n_pieces += len(words_pieces[end])
+                end += 1
+            windows.append((start, end))
+            if end == len(words_pieces):
                 break
+            # окно сдвигается хотя бы на половину своей длины, даже если оно короче window_overlap
+            start = max(end - self._window_overlap, (start + end + 1) // 2)
+        return windows
+
+    def _predict(self, input_ids: List[List[int]], input_masks: List[List[int]]) -> np.ndarray:
+        """ Прогоняет все окна через модель
+
+        :param input_ids: Векторы окон
+        :param input_masks: Маски окон
+        :return: Массив вероятностей классов размера (количество окон, max_length, количество классов)
+        """
+        if not input_ids:
+            return np.zeros((0, 0, len(self._class2label)))
+        return self._model.predict(
+            [np.array(input_ids), np.array(input_masks)], batch_size=self._batch_size
+        )[0]
+
+    def _get_word_classes(self, word_ids: List[int], preds: np.ndarray, n_words: int) -> np.ndarray:
+        """ Из предсказаний для bpe-токенов получаем классы целых токенов: токен получает класс B-TERM, если хотя бы
+        один его bpe-токен предсказан как B-TERM, иначе I-TERM, если хотя бы один предсказан как I-TERM, иначе O
 
-            bpe_tokens, input_ids, input_masks, tags = self._vectorizer.vectorize(
-                tokens[start: end], labels[start: end]
-            )
-            preds = self._model.predict([np.array([input_ids]), np.array([input_masks])])[0][0]
-            all_bpe_tokens.extend(bpe_tokens)
-            all_predictions.extend(preds[:len(bpe_tokens)])
-
-        result = self._get_preds_with_tokens(all_bpe_tokens, all_predictions)
-        result = self._heuristic_validator.validate(result)
-        result = validate_sequence(result)
-        return result
-
-    def _get_preds_with_tokens(self, bpe_tokens, preds):
-        result = []
-        token = []
-        tags = []
-        for bpe_token, pred in zip(bpe_tokens, preds):
-            if bpe_token.startswith('##'):
-                token.append(bpe_token[2:])
-                tags.append(self._class2label[np.argmax(pred)])
-            else:
-                if len(token) > 0:
-                    self._process_token(result, tags, token)
-                token = [bpe_token]
-                tags = [self._class2label[np.argmax(pred)]]
-        self._process_token(result, tags, token)
-        return result
-
-    def _process_token(self, result, tags, token):
-        token_str = ''.join(token)
-        tag = Tags.NOT_TERM.value
-        if Tags.B_TERM.value in tags:
-            tag = Tags.B_TERM.value
-        elif Tags.I_TERM.value in tags:
-            tag = Tags.I_TERM.value
-        result.append((token_str, tag))
+        :param word_ids: Номер токена для каждого bpe-токена окна (номера идут по неубыванию)
+        :param preds: Предсказания модели для bpe-токенов окна (n_pieces x n_classes)
+        :param n_words: Количество токенов в окне
+        :return: int8-массив классов токенов окна
+        """
+        priorities = np.zeros(n_words, dtype=np.int8)
+        if len(word_ids) > 0:
+            word_ids = np.asarray(word_ids)
+            pieces_priorities = CLASS_PRIORITY[np.argmax(preds[:len(word_ids)], axis=1)]
+            # границы сегментов bpe-токенов, относящихся к одному токену
+            starts = np.flatnonzero(np.r_[True, word_ids[1:] != word_ids[:-1]])
+            priorities[word_ids[starts]] = np.maximum.reduceat(pieces_priorities, starts)
+        return PRIORITY_CLASS[priorities]
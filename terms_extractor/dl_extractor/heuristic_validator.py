@@ -1,9 +1,9 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-import pymorphy2
 from pymorphy2.analyzer import Parse
 
-from utils.constants import Tags, TERM_SET
+from utils.constants import Tags, label2class, class2label
+from utils.morphology import morph
 
 ADJF = 'ADJF'
 CONJ = 'CONJ'
@@ -16,130 +16,158 @@ VERB = 'VERB'
 
 GENT = 'gent'
 
+PUNCTUATION = {'.', ',', ':', ';'}
+LATIN_SYMBOLS = 'qwertyuiopasdfghjklzxcvbnm'
+
+# битовые флаги морфологического кода токена. Флаги "может быть ..." выставляются, если хотя бы один из разборов
+# токена имеет эту часть речи
+MAYBE_ADJF = 1
+MAYBE_NOUN = 1 << 1
+MAYBE_PRTF = 1 << 2
+MAYBE_PREP = 1 << 3
+MAYBE_CONJ = 1 << 4
+# у токена единственный разбор, и это глагол, деепричастие или краткое причастие
+UNAMBIGUOUS_VERB = 1 << 5
+# самый вероятный разбор - существительное или прилагательное
+FIRST_NOUN_OR_ADJF = 1 << 6
+# самый вероятный разбор - в родительном падеже
+FIRST_GENT = 1 << 7
+IS_LATIN = 1 << 8
+IS_PUNCT = 1 << 9
+
+B_TERM = label2class[Tags.B_TERM.value]
+I_TERM = label2class[Tags.I_TERM.value]
+NOT_TERM = label2class[Tags.NOT_TERM.value]
+
+
+def get_morph_code(token: str) -> int:
+    """ Разбирает токен и переводит всё, что нужно эвристикам, в компактный код из битовых флагов
+
+    :param token: Токен
+    :return: Морфологический код токена
+    """
+    parses = morph.parse(token)
+    code = 0
+    if _check_pos(ADJF, parses):
+        code |= MAYBE_ADJF
+    if _check_pos(NOUN, parses):
+        code |= MAYBE_NOUN
+    if _check_pos(PRTF, parses):
+        code |= MAYBE_PRTF
+    if _check_pos(PREP, parses):
+        code |= MAYBE_PREP
+    if _check_pos(CONJ, parses):
+        code |= MAYBE_CONJ
+    if len(parses) == 1 and (_check_pos(VERB, parses) or _check_pos(GRND, parses) or _check_pos(PRTS, parses)):
+        code |= UNAMBIGUOUS_VERB
+    if parses[0].tag.POS in [NOUN, ADJF]:
+        code |= FIRST_NOUN_OR_ADJF
+    if parses[0].tag.case == GENT:
+        code |= FIRST_GENT
+    if _is_latin(token):
+        code |= IS_LATIN
+    if token in PUNCTUATION:
+        code |= IS_PUNCT
+    return code
+
+
+def get_morph_codes(tokens: List[str]) -> List[int]:
+    return [get_morph_code(token) for token in tokens]
+
+
+def _check_pos(pos: str, parses: List[Parse]) -> bool:
+    for parse in parses:
+        if pos in parse.tag:
+            return True
+    return False
+
+
+def _is_latin(token: str) -> bool:
+    for char in token.lower():
+        if char not in LATIN_SYMBOLS:
+            return False
+    return True
+
 
 class HeuristicValidator:
+    """ Применяет эвристики к результату извлечения терминов. Каждый токен разбирается один раз, после чего эвристики
+    работают с массивами морфологических кодов и классов тэгов, каждая за один линейный проход
+    """
 
-    def __init__(self):
-        self._morph = pymorphy2.MorphAnalyzer()
-
-    def validate(self, result: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
-        self._heuristic_1(result)
-        self._heuristic_2(result)
-        self._heuristic_3(result)
-        self._heuristic_4(result)
-        self._heuristic_5(result)
-        self._heuristic_6(result)
-        self._heuristic_7(result)
+    def validate(
+            self, result: List[Tuple[str, str]], morph_codes: Optional[List[int]] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        :param result: Список кортежей (Токен, Тэг), изменяется на месте
+        :param morph_codes: Морфологические коды токенов (см. get_morph_codes), если они уже посчитаны
+        :return: Список кортежей (Токен, Тэг)
+        """
+        if morph_codes is None:
+            morph_codes = get_morph_codes([token for token, _ in result])
+        tags = [label2class[tag] for _, tag in result]
+        self._heuristic_1(tags, morph_codes)
+        self._heuristic_2(tags, morph_codes)
+        self._heuristic_3(tags, morph_codes)
+        self._heuristic_4(tags, morph_codes)
+        self._heuristic_5(tags, morph_codes)
+        self._heuristic_6(tags, morph_codes)
+        self._heuristic_7(tags, morph_codes)
+        for i, (token, tag) in enumerate(result):
+            if label2class[tag] != tags[i]:
+                result[i] = (token, class2label[tags[i]])
         return result
 
-    def _heuristic_1(self, result: List[Tuple[str, str]]):
+    def _heuristic_1(self, tags: List[int], codes: List[int]):
         """ Валидация цепочек, которые представляют собой СУЩ + СУЩ в род.п., например: методы сжатия данных"""
-
-        for result_pair_1, result_pair_2 in zip(result, result[1:]):
-            id_1 = result.index(result_pair_1)
-            id_2 = id_1 + 1
+        for i in range(len(tags) - 1):
             # если последовательность не содержит терминов, то пропускаем
-            if result_pair_1[1] == Tags.NOT_TERM.value and result_pair_2[1] == Tags.NOT_TERM.value:
+            if tags[i] == NOT_TERM and tags[i + 1] == NOT_TERM:
                 continue
-            token_1, token_2 = result_pair_1[0], result_pair_2[0]
-            pos_1 = self._morph.parse(token_1)[0].tag.POS
-            case_2 = self._morph.parse(token_2)[0].tag.case
-            if pos_1 in [NOUN, ADJF] and case_2 == GENT:
-                if result_pair_1[1] not in TERM_SET:
-                    result_pair_1 = (token_1, Tags.B_TERM.value)
-                    result[id_1] = result_pair_1
-                result_pair_2 = (token_2, Tags.I_TERM.value)
-                result[id_2] = result_pair_2
-
-    def _heuristic_2(self, result: List[Tuple[str, str]]):
+            if codes[i] & FIRST_NOUN_OR_ADJF and codes[i + 1] & FIRST_GENT:
+                if tags[i] == NOT_TERM:
+                    tags[i] = B_TERM
+                tags[i + 1] = I_TERM
+
+    def _heuristic_2(self, tags: List[int], codes: List[int]):
         """
         Если токены представляют собой последовательность ПРИЛ + СУЩ и оба помечены B-TERM, то приводим к
         последовательности B-TERM I-TERM
         """
+        for i in range(len(tags) - 1):
+            if tags[i] == B_TERM and tags[i + 1] == B_TERM:
+                if codes[i] & MAYBE_ADJF and codes[i + 1] & MAYBE_NOUN:
+                    tags[i + 1] = I_TERM
 
-        for result_pair_1, result_pair_2 in zip(result, result[1:]):
-            id_1 = result.index(result_pair_1)
-            id_2 = id_1 + 1
-            # если последовательность не содержит терминов, то пропускаем
-            if result_pair_1[1] == Tags.B_TERM.value and result_pair_2[1] == Tags.B_TERM.value:
-                token_1, token_2 = result_pair_1[0], result_pair_2[0]
-                parse_1 = self._morph.parse(token_1)
-                parse_2 = self._morph.parse(token_2)
-                is_adj_1 = self.__check_pos(ADJF, parse_1)
-                is_noun_2 = self.__check_pos(NOUN, parse_2)
-                if is_adj_1 and is_noun_2:
-                    result[id_1] = (token_1, Tags.B_TERM.value)
-                    result[id_2] = (token_2, Tags.I_TERM.value)
-
-    def _heuristic_3(self, result: List[Tuple[str, str]]):
+    def _heuristic_3(self, tags: List[int], codes: List[int]):
         """ Удаление тэга B-TERM или I-TERM, если он был присовен токену знака пунктуации """
-        for i, result_pair in enumerate(result):
-            if result_pair[0] in ['.', ',', ':', ';'] and result_pair[1] in [Tags.B_TERM.value, Tags.I_TERM.value]:
-                result[i] = (result_pair[0], Tags.NOT_TERM.value)
+        for i in range(len(tags)):
+            if codes[i] & IS_PUNCT:
+                tags[i] = NOT_TERM
 
-    def _heuristic_4(self, result: List[Tuple[str, str]]):
+    def _heuristic_4(self, tags: List[int], codes: List[int]):
         """ Если последний токен в термине имеет часть речи ПРИЛ, а следующий токен - СУЩ, но либо не входит в термин,
         либо имеет тэг "B-TERM", то второй токен включаем в состав термина
         """
-        for result_pair_1, result_pair_2 in zip(result, result[1:]):
-            id_1 = result.index(result_pair_1)
-            id_2 = id_1 + 1
-            if result_pair_1[1] in TERM_SET and result_pair_2[1] != Tags.I_TERM.value:
-                token_1, token_2 = result_pair_1[0], result_pair_2[0]
-                parse_1 = self._morph.parse(token_1)
-                parse_2 = self._morph.parse(token_2)
-                is_adj_1 = self.__check_pos(ADJF, parse_1)
-                is_prtf_1 = self.__check_pos(PRTF, parse_1)
-                is_noun_2 = self.__check_pos(NOUN, parse_2)
-                if is_noun_2:
-                    if is_adj_1 or is_prtf_1:
-                        result[id_2] = (token_2, Tags.I_TERM.value)
-
-    def _heuristic_5(self, result: List[Tuple[str, str]]):
+        for i in range(len(tags) - 1):
+            if tags[i] != NOT_TERM and tags[i + 1] != I_TERM:
+                if codes[i + 1] & MAYBE_NOUN and codes[i] & (MAYBE_ADJF | MAYBE_PRTF):
+                    tags[i + 1] = I_TERM
+
+    def _heuristic_5(self, tags: List[int], codes: List[int]):
         """ Удаление тэга B-TERM у предлога и союза (допускаем, что предлог может входить в состав термина, но не может
         начинать его """
-        for i, result_pair in enumerate(result):
-            if result_pair[1] == Tags.B_TERM.value:
-                parse = self._morph.parse(result_pair[0])
-                is_prep = self.__check_pos(PREP, parse)
-                is_conj = self.__check_pos(CONJ, parse)
-                if is_prep or is_conj:
-                    result[i] = (result_pair[0], Tags.NOT_TERM.value)
-
-    def _heuristic_6(self, result: List[Tuple[str, str]]):
+        for i in range(len(tags)):
+            if tags[i] == B_TERM and codes[i] & (MAYBE_PREP | MAYBE_CONJ):
+                tags[i] = NOT_TERM
+
+    def _heuristic_6(self, tags: List[int], codes: List[int]):
         """ Удаление тэга Термин у однозначного глагола или деепричастия """
-        for i, result_pair in enumerate(result):
-            if result_pair[1] in [Tags.B_TERM.value, Tags.I_TERM.value]:
-                parse = self._morph.parse(result_pair[0])
-                is_verb = self.__check_pos(VERB, parse)
-                is_grnd = self.__check_pos(GRND, parse)
-                is_prts = self.__check_pos(PRTS, parse)
-                if len(parse) == 1:
-                    if is_verb or is_grnd or is_prts:
-                        result[i] = (result_pair[0], Tags.NOT_TERM.value)
-
-    def _heuristic_7(self, result: List[Tuple[str, str]]):
-        """ Если следующий за термином токен состоит только из латинских символов, то включаем его в состав термина """
-        for result_pair_1, result_pair_2 in zip(result, result[1:]):
-            id_1 = result.index(result_pair_1)
-            id_2 = id_1 + 1
-            if result_pair_1[1] in TERM_SET:
-                token_2 = result_pair_2[0]
-                is_latin = self._is_latin(token_2)
-                if is_latin:
-                    result[id_2] = (token_2, Tags.I_TERM.value)
-
-    def __check_pos(self, pos: str, parses: List[Parse]) -> bool:
-            for parse in parses:
-                if pos in parse.tag:
-                    return True
-            return False
+        for i in range(len(tags)):
+            if tags[i] != NOT_TERM and codes[i] & UNAMBIGUOUS_VERB:
+                tags[i] = NOT_TERM
 
-    def _is_latin(self, token: str) -> bool:
-        latin_symbols = 'qwertyuiopasdfghjklzxcvbnm'
-        is_latin = True
-        for char in token.lower():
-            if char not in latin_symbols:
-                is_latin = False
-                return is_latin
-        return is_latin
+    def _heuristic_7(self, tags: List[int], codes: List[int]):
+        """ Если следующий за термином токен состоит только из латинских символов, то включаем его в состав термина """
+        for i in range(len(tags) - 1):
+            if tags[i] != NOT_TERM and codes[i + 1] & IS_LATIN:
+                tags[i + 1] = I_TERM
@@ -0,0 +1,134 @@
+""" Оптимизированный для CPU бэкенд модели извлечения терминов: экспорт в ONNX с динамической int8-квантизацией и
+инференс через ONNX Runtime.
+
+Для работы нужны дополнительные пакеты ``tf2onnx`` (только для экспорта) и ``onnxruntime``. Экспорт и проверка
+совпадения предсказаний с Keras-моделью запускаются командой
+
+    python -m terms_extractor.dl_extractor.onnx_model
+"""
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from utils.paths import TERMS_EXTRACTOR_WEIGHTS_PATH, TERMS_EXTRACTOR_ONNX_PATH
+from utils.utilities import tokenize
+
+# тексты, на которых сравниваются предсказания Keras- и ONNX-моделей
+PARITY_SAMPLE_TEXTS = [
+    'Научные вычисления включают прикладную математику (особенно численный анализ), вычислительную технику '
+    '(особенно высокопроизводительные вычисления) и математическое моделирование объектов изучаемых научной '
+    'дисциплиной.',
+    'Модель используется в методе генерации и определения форм слов для решения задач морфологического синтеза и '
+    'анализа текстов.',
+    'Для разработки системы использовался язык программирования Python и библиотека TensorFlow.',
+    'В работе предложен метод сжатия данных на основе свёрточных нейронных сетей.',
+]
+
+
+class OnnxModel:
+    """ Модель извлечения терминов, экспортированная в ONNX. Повторяет интерфейс predict Keras-модели """
+
+    def __init__(self, path: str = TERMS_EXTRACTOR_ONNX_PATH, n_threads: int = None):
+        """
+        :param path: Путь к ONNX-модели
+        :param n_threads: Количество потоков для инференса (по умолчанию выбирает ONNX Runtime)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if n_threads:
+            options.intra_op_num_threads = n_threads
+        self._session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_names = [model_input.name for model_input in self._session.get_inputs()]
+
+    def predict(self, inputs: List[np.ndarray], batch_size: int = 32, **kwargs) -> List[np.ndarray]:
+        """
+        :param inputs: Векторы текстов и маски
+        :param batch_size: Размер батча
+        :return: Список из одного массива вероятностей классов (количество текстов, max_length, количество классов)
+        """
+        input_ids, input_masks = inputs
+        predictions = []
+        for start in range(0, len(input_ids), batch_size):
+            feed = {
+                self._input_names[0]: input_ids[start: start + batch_size].astype(np.int32),
+                self._input_names[1]: input_masks[start: start + batch_size].astype(np.int32),
+            }
+            predictions.append(self._session.run(None, feed)[0])
+        return [np.concatenate(predictions)]
+
+
+def export_onnx_model(model, path: str = TERMS_EXTRACTOR_ONNX_PATH, quantize: bool = True):
+    """ Экспортирует Keras-модель в ONNX и при необходимости квантизует веса в int8
+
+    :param model: Keras-модель с загруженными весами (см. model.get_model)
+    :param path: Путь, по которому будет сохранена ONNX-модель
+    :param quantize: Применять ли динамическую int8-квантизацию
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    input_signature = (
+        tf.TensorSpec((None, None), tf.int32, name='input_ids'),
+        tf.TensorSpec((None, None), tf.int32, name='attention_mask'),
+    )
+
+    @tf.function(input_signature=input_signature)
+    def forward(input_ids, attention_mask):
+        return model([input_ids, attention_mask], training=False)[0]
+
+    float_path = f'{os.path.splitext(path)[0]}.float.onnx' if quantize else path
+    tf2onnx.convert.from_function(forward, input_signature=input_signature, opset=13, output_path=float_path)
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(float_path, path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+
+
+def check_parity(reference_model, model, texts: List[str] = None, batch_size: int = 32) -> Dict[str, float]:
+    """ Сравнивает предсказания двух моделей на фиксированном наборе текстов
+
+    :param reference_model: Эталонная (Keras) модель
+    :param model: Проверяемая модель
+    :param texts: Тексты для сравнения (по умолчанию PARITY_SAMPLE_TEXTS)
+    :param batch_size: Размер батча
+    :return: Максимальное отклонение вероятностей и доля bpe-токенов с совпавшим классом
+    """
+    from terms_extractor.dl_extractor.vectorizer import Vectorizer
+
+    vectorizer = Vectorizer()
+    input_ids = []
+    input_masks = []
+    n_pieces = []
+    for text in texts or PARITY_SAMPLE_TEXTS:
+        tokenized_text, ids, masks, _ = vectorizer.vectorize_pieces(vectorizer.split_words(tokenize(text)))
+        input_ids.append(ids)
+        input_masks.append(masks)
+        n_pieces.append(min(len(tokenized_text), vectorizer.max_length))
+    inputs = [np.array(input_ids), np.array(input_masks)]
+
+    reference_preds = reference_model.predict(inputs, batch_size=batch_size)[0]
+    preds = model.predict(inputs, batch_size=batch_size)[0]
+    max_abs_diff = 0.0
+    n_agreed = 0
+    for reference_pred, pred, n in zip(reference_preds, preds, n_pieces):
+        max_abs_diff = max(max_abs_diff, float(np.abs(reference_pred[:n] - pred[:n]).max(initial=0.0)))
+        n_agreed += int((reference_pred[:n].argmax(axis=-1) == pred[:n].argmax(axis=-1)).sum())
+    return {
+        'max_abs_diff': max_abs_diff,
+        'class_agreement': n_agreed / max(sum(n_pieces), 1),
+    }
+
+
+if __name__ == '__main__':
+    from terms_extractor.dl_extractor.model import get_model
+
+    keras_model = get_model()
+    keras_model.load_weights(TERMS_EXTRACTOR_WEIGHTS_PATH)
+    export_onnx_model(keras_model)
+    report = check_parity(keras_model, OnnxModel())
+    print(f'ONNX model saved to {TERMS_EXTRACTOR_ONNX_PATH}')
+    print(f'Max abs probability diff: {report["max_abs_diff"]:.5f}, class agreement: {report["class_agreement"]:.4f}')
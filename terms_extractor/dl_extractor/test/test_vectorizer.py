@@ -0,0 +1,37 @@
+import unittest
+
+from utils.utilities import tokenize
+from terms_extractor.dl_extractor.vectorizer import Vectorizer
+
+SAMPLE_TEXTS = [
+    'Научные вычисления включают прикладную математику (особенно численный анализ), вычислительную технику.',
+    'Для разработки системы использовался язык программирования Python и библиотека TensorFlow.',
+    'Модель используется в методе генерации и определения форм слов для решения задач морфологического синтеза и '
+    'анализа текстов. ' * 5,
+    '',
+]
+
+
+class TestVectorizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._vectorizer = Vectorizer()
+        cls._fast_vectorizer = Vectorizer(use_fast=True)
+
+    def test_fast_mode_matches_slow_mode(self):
+        for text in SAMPLE_TEXTS:
+            tokens = tokenize(text)
+            _, input_ids, input_masks, word_ids = self._vectorizer.vectorize_pieces(
+                self._vectorizer.split_words(tokens)
+            )
+            _, fast_input_ids, fast_input_masks, fast_word_ids = self._fast_vectorizer.vectorize_pieces(
+                self._fast_vectorizer.split_words(tokens)
+            )
+            self.assertEqual(input_ids, fast_input_ids)
+            self.assertEqual(input_masks, fast_input_masks)
+            self.assertEqual(word_ids, fast_word_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,29 @@
+import functools
 from typing import List, Tuple, Any
 
-from transformers import BertTokenizer
+from transformers import BertTokenizer, BertTokenizerFast
 
 from utils.constants import label2class
 
 
 class Vectorizer:
 
-    def __init__(self):
+    def __init__(self, use_fast: bool = False):
+        """
+        :param use_fast: Использовать быстрый (Rust) токенизатор в split_words и vectorize_pieces. Он делит на
+        bpe-токены сразу весь текст или батч текстов, а маска строится без повторной токенизации окна, но совпадает
+        с маской обычного режима
+        """
         self._tokenizer = BertTokenizer.from_pretrained('DeepPavlov/rubert-base-cased',
                                                         do_lower_case=False)
+        self._fast_tokenizer = None
+        if use_fast:
+            self._fast_tokenizer = BertTokenizerFast.from_pretrained('DeepPavlov/rubert-base-cased',
+                                                                     do_lower_case=False)
 
         self._label2class = label2class
         self._max_length = 128
+        self._n_mask_pieces = functools.lru_cache(maxsize=100000)(self._count_mask_pieces)
 
     def vectorize(self, text: List[str], token_labels: List[str]) -> Tuple[List[str], List[int], List[int], List[int]]:
         tokenized_text, input_masks, labels = self._tokenize(text, token_labels)
@@ -29,6 +40,70 @@ class Vectorizer:
 
         return tokenized_text, input_ids, input_masks, tags
 
+    @property
+    def max_length(self) -> int:
+        """ Максимальное число bpe-токенов, которое подаётся в модель за один раз """
+        return self._max_length
+
+    def split_words(self, text: List[str]) -> List[List[str]]:
+        """ Делит каждый токен текста на bpe-токены. Токен, для которого токенизатор не вернул ни одного bpe-токена,
+        заменяется на [UNK], чтобы каждому токену соответствовал хотя бы один bpe-токен
+
+        :param text: Текст (список токенов)
+        :return: Список bpe-токенов для каждого токена
+        """
+        return self.split_words_batch([text])[0]
+
+    def split_words_batch(self, texts: List[List[str]]) -> List[List[List[str]]]:
+        """ Делит на bpe-токены каждый токен нескольких текстов. В режиме use_fast все тексты токенизируются одним
+        вызовом быстрого токенизатора, а bpe-токены сопоставляются токенам по их номерам (word ids)
+
+        :param texts: Список текстов (списков токенов)
+        :return: Для каждого текста список bpe-токенов для каждого токена
+        """
+        if self._fast_tokenizer is None:
+            return [
+                [self._tokenizer.tokenize(token) or [self._tokenizer.unk_token] for token in text] for text in texts
+            ]
+
+        texts_pieces = [[[] for _ in text] for text in texts]
+        non_empty = [i for i, text in enumerate(texts) if text]
+        if non_empty:
+            encodings = self._fast_tokenizer(
+                [texts[i] for i in non_empty], is_split_into_words=True, add_special_tokens=False
+            )
+            for batch_index, i in enumerate(non_empty):
+                for piece, word_id in zip(encodings.tokens(batch_index), encodings.word_ids(batch_index)):
+                    texts_pieces[i][word_id].append(piece)
+        for words_pieces in texts_pieces:
+            for pieces in words_pieces:
+                if not pieces:
+                    pieces.append(self._tokenizer.unk_token)
+        return texts_pieces
+
+    def vectorize_pieces(self, words_pieces: List[List[str]]) -> Tuple[List[str], List[int], List[int], List[int]]:
+        """ Векторизация текста, который уже разделён на bpe-токены (см. split_words)
+
+        :param words_pieces: Список bpe-токенов для каждого токена
+        :return: ``tokenized_text``: Текст, разделенный на bpe-токены,
+                 ``input_ids``: Вектор текста,
+                 ``input_masks``: Маска для текста,
+                 ``word_ids``: Номер токена для каждого bpe-токена, попавшего в input_ids
+        """
+        tokenized_text = []
+        word_ids = []
+        for word_id, pieces in enumerate(words_pieces):
+            tokenized_text.extend(pieces)
+            word_ids.extend([word_id] * len(pieces))
+
+        input_masks = self._get_attention_mask(tokenized_text)
+        input_ids = self._tokenizer.convert_tokens_to_ids(tokenized_text)
+
+        input_ids = self._pad(input_ids)
+        input_masks = self._pad(input_masks)
+
+        return tokenized_text, input_ids, input_masks, word_ids[:self._max_length]
+
     def _pad(self, input: List[Any]) -> List[Any]:
         if len(input) >= self._max_length:
             return input[:self._max_length]
@@ -36,6 +111,10 @@ class Vectorizer:
             input.append(0)
         return input
 
+    def _count_mask_pieces(self, piece: str) -> int:
+        """ Количество частей, на которые encode_plus делит bpe-токен при построении маски """
+        return len(self._tokenizer.tokenize(piece))
+
     def _tokenize(self, text: List[str], token_labels: List[str]) -> Tuple[List[str], List[int], List[str]]:
         tokenized_text = []
         labels = []
@@ -51,6 +130,14 @@ class Vectorizer:
             # Add the same label to the new list of labels `n_subwords` times
             labels.extend([label] * n_subwords)
 
+        return tokenized_text, self._get_attention_mask(tokenized_text), labels
+
+    def _get_attention_mask(self, tokenized_text: List[str]) -> List[int]:
+        if self._fast_tokenizer is not None:
+            # encode_plus повторно токенизирует каждый bpe-токен (например, "##ing" делится на "#", "#", "ing") и
+            # добавляет [CLS] и [SEP]: маска той же длины считается по кэшу количества частей bpe-токенов
+            n_pieces = sum(self._n_mask_pieces(piece) for piece in tokenized_text)
+            return [1] * min(n_pieces + 2, self._max_length)
         inputs = self._tokenizer.encode_plus(
             tokenized_text,
             is_pretokenized=True,
@@ -58,5 +145,4 @@ class Vectorizer:
             max_length=self._max_length,
             truncation=True
         )
-
-        return tokenized_text, inputs['attention_mask'], labels
+        return inputs['attention_mask']
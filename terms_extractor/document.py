@@ -0,0 +1,38 @@
+import functools
+from typing import List, Optional, Union
+
+from utils.morphology import morph
+from utils.utilities import tokenize
+from terms_extractor.dl_extractor.heuristic_validator import get_morph_codes
+
+
+class Document:
+    """ Результат анализа текста, общий для извлекателей терминов.
+
+    Текст токенизируется один раз при создании документа, а леммы и морфологические коды считаются при первом
+    обращении и затем переиспользуются словарным и нейросетевым извлекателями.
+    """
+
+    def __init__(self, text: Union[str, List[str]]):
+        """
+        :param text: Входной текст (строка или список токенов)
+        """
+        if isinstance(text, str):
+            self.tokens = tokenize(text)
+        else:
+            self.tokens = list(text)
+        # bpe-токены для каждого токена, заполняются нейросетевым извлекателем
+        self.words_pieces: Optional[List[List[str]]] = None
+
+    @functools.cached_property
+    def lemmas(self) -> List[str]:
+        """ Леммы токенов (наиболее вероятная начальная форма) """
+        return [morph.parse(token)[0].normal_form for token in self.tokens]
+
+    @functools.cached_property
+    def morph_codes(self) -> List[int]:
+        """ Морфологические коды токенов для эвристик (см. heuristic_validator.get_morph_codes) """
+        return get_morph_codes(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
@@ -0,0 +1,54 @@
+import functools
+from typing import List, Tuple
+
+import pymorphy2
+from pymorphy2.analyzer import Parse
+
+PARSE_CACHE_SIZE = 100000
+
+
+class MorphologyService:
+    """ Общий для процесса морфологический анализатор pymorphy2 с кэшем разборов.
+
+    Кэш ограничен по числу словоформ, потокобезопасен и ведёт статистику попаданий и промахов (см. cache_info).
+    """
+
+    def __init__(self, cache_size: int = PARSE_CACHE_SIZE):
+        """
+        :param cache_size: Максимальное число словоформ в кэше
+        """
+        self._morph = pymorphy2.MorphAnalyzer()
+        self._cached_parse = functools.lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, word: str) -> Tuple[Parse, ...]:
+        """ Возвращает возможные морфологические разборы словоформы (результат кэшируется)
+
+        :param word: Словоформа
+        :return: Разборы в порядке убывания вероятности
+        """
+        return self._cached_parse(word)
+
+    def normal_forms(self, word: str) -> List[str]:
+        """ Возвращает возможные начальные формы словоформы, как pymorphy2.MorphAnalyzer.normal_forms
+
+        :param word: Словоформа
+        :return: Уникальные начальные формы в порядке убывания вероятности
+        """
+        normal_forms = []
+        for parse in self.parse(word):
+            if parse.normal_form not in normal_forms:
+                normal_forms.append(parse.normal_form)
+        return normal_forms
+
+    def cache_info(self):
+        """ Статистика кэша разборов: hits, misses, maxsize, currsize """
+        return self._cached_parse.cache_info()
+
+    def cache_clear(self):
+        self._cached_parse.cache_clear()
+
+    def _parse(self, word: str) -> Tuple[Parse, ...]:
+        return tuple(self._morph.parse(word))
+
+
+morph = MorphologyService()
@@ -1,11 +1,130 @@
+import queue
 import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
 from pymystem3 import Mystem
 
 morph = Mystem()
 
+# разделитель фраз при пакетной лемматизации. Mystem не считает его словом и возвращает в составе текста
+# между словами, поэтому по нему результат делится обратно на фразы
+SEPARATOR = '|'
+# количество фраз, нормализованных normalize_mystem_batch, которые хранятся между вызовами
+BATCH_CACHE_SIZE = 10000
+
+_batch_cache = OrderedDict()
+_batch_cache_lock = threading.Lock()
+
 
 @functools.lru_cache(maxsize=10000)
 def normalize_mystem(term: str) -> str:
     lemmas = morph.lemmatize(term)
     return ''.join(lemmas[:-1])
+
+
+class MystemPool:
+    """ Пул процессов Mystem для одновременной лемматизации из нескольких потоков """
+
+    def __init__(self, size: int = 2):
+        """
+        :param size: Количество процессов Mystem
+        """
+        self._pool = queue.Queue()
+        for _ in range(size):
+            self._pool.put(Mystem())
+
+    @contextmanager
+    def acquire(self) -> Iterator[Mystem]:
+        """ Забирает свободный процесс Mystem на время блока with """
+        mystem = self._pool.get()
+        try:
+            yield mystem
+        finally:
+            self._pool.put(mystem)
+
+    def normalize(self, term: str) -> str:
+        with self.acquire() as mystem:
+            return ''.join(mystem.lemmatize(term)[:-1])
+
+    def normalize_batch(self, phrases: List[str]) -> List[str]:
+        with self.acquire() as mystem:
+            return normalize_mystem_batch(phrases, mystem)
+
+
+def normalize_mystem_batch(phrases: List[str], mystem: Optional[Mystem] = None) -> List[str]:
+    """ Лемматизирует несколько фраз за одно обращение к Mystem: фразы объединяются через разделитель, а результат
+    разбора делится по нему обратно. Фразы, которые сами содержат разделитель или перевод строки, лемматизируются
+    по одной. Результат для каждой фразы совпадает с normalize_mystem. Уже нормализованные фразы берутся из общего
+    для модуля кэша, в Mystem отправляются только остальные, каждая один раз
+
+    :param phrases: Фразы
+    :param mystem: Процесс Mystem (по умолчанию общий для модуля)
+    :return: Нормализованные фразы
+    """
+    results = [None] * len(phrases)
+    misses = dict()
+    with _batch_cache_lock:
+        for i, phrase in enumerate(phrases):
+            if phrase in _batch_cache:
+                _batch_cache.move_to_end(phrase)
+                results[i] = _batch_cache[phrase]
+            else:
+                misses.setdefault(phrase, []).append(i)
+    if not misses:
+        return results
+    normalized_misses = list(zip(misses, _lemmatize_batch(list(misses), mystem or morph)))
+    for phrase, normalized in normalized_misses:
+        for i in misses[phrase]:
+            results[i] = normalized
+    with _batch_cache_lock:
+        for phrase, normalized in normalized_misses:
+            _batch_cache[phrase] = normalized
+            _batch_cache.move_to_end(phrase)
+        while len(_batch_cache) > BATCH_CACHE_SIZE:
+            _batch_cache.popitem(last=False)
+    return results
+
+
+def _lemmatize_batch(phrases: List[str], mystem: Mystem) -> List[str]:
+    """ Лемматизирует фразы за одно обращение к Mystem без кэша (см. normalize_mystem_batch) """
+    results = [None] * len(phrases)
+    batch = []
+    for i, phrase in enumerate(phrases):
+        if SEPARATOR in phrase or '\n' in phrase:
+            results[i] = ''.join(mystem.lemmatize(phrase)[:-1])
+        else:
+            batch.append(i)
+    if batch:
+        analysis = mystem.analyze(SEPARATOR.join(phrases[i] for i in batch))
+        segments = _split_analysis(analysis)
+        if len(segments) != len(batch):
+            # разделитель оказался внутри слова, и границы фраз потерялись: лемматизируем по одной
+            segments = [mystem.lemmatize(phrases[i])[:-1] for i in batch]
+        for i, lemmas in zip(batch, segments):
+            results[i] = ''.join(lemmas)
+    return results
+
+
+def _split_analysis(analysis: List[Dict[str, Any]]) -> List[List[str]]:
+    """ Делит разбор объединённых фраз на леммы отдельных фраз. Как и в normalize_mystem, текст после последнего
+    слова фразы (перед разделителем или концом строки) отбрасывается
+    """
+    segments = [[]]
+    for item in analysis:
+        text = item.get('text', '')
+        if 'analysis' in item:
+            lemma = item['analysis'][0]['lex'] if item['analysis'] else text
+            if lemma:
+                segments[-1].append(lemma)
+        elif SEPARATOR in text:
+            parts = text.split(SEPARATOR)
+            for _ in parts[1:]:
+                segments.append([])
+            if parts[-1] and '\n' not in parts[-1]:
+                segments[-1].append(parts[-1])
+        elif '\n' not in text and text:
+            segments[-1].append(text)
+    return segments
@@ -9,10 +9,14 @@ RELATION_EXTRACTOR_PATH = os.path.join(PROJECT_PATH, 'relation_extractor')
 ASPECT_EXTRACTOR_PATH = os.path.join(PROJECT_PATH, 'aspect_extractor')
 
 TERMS_EXTRACTOR_WEIGHTS_PATH = os.path.join(TERMS_EXTRACTOR_PATH, 'dl_extractor/weights', 'weights.h5')
+TERMS_EXTRACTOR_ONNX_PATH = os.path.join(TERMS_EXTRACTOR_PATH, 'dl_extractor/weights', 'model.onnx')
+DICT_EXTRACTOR_INDEX_PATH = os.path.join(DICT_EXTRACTOR_PATH, 'ngramm_lemma_terms.idx')
 RELATION_EXTRACTOR_WEIGHTS_PATH = os.path.join(
     RELATION_EXTRACTOR_PATH, 'dl_relation_extractor/weights'
 )
 ASPECT_EXTRACTOR_WEIGHTS_PATH = os.path.join(ASPECT_EXTRACTOR_PATH, 'weights', 'weights.h5')
 
 WIKIDATA_DUMP_PATH = os.path.join(ENTITY_LINKER_PATH, 'wikidata_dump', 'dump.json')
+WIKIDATA_NAME_INDEX_PATH = os.path.join(ENTITY_LINKER_PATH, 'wikidata_dump', 'name_index.sqlite')
+WIKIDATA_EMBEDDINGS_PATH = os.path.join(ENTITY_LINKER_PATH, 'wikidata_dump', 'entity_embeddings.npy')
 FASTTEXT_MODEL_PATH = os.path.join(ENTITY_LINKER_PATH, 'fasttext_model', 'ft_native_300_ru_wiki_lenta_remstopwords.bin')
\ No newline at end of file
@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from utils.normalize import MystemPool, morph, normalize_mystem, normalize_mystem_batch
+
+
+class TestNormalize(unittest.TestCase):
+
+    def setUp(self):
+        self._phrases = [
+            'нарушение слуха',
+            'языки программирования, (например) Python.',
+            '',
+            'снижение способности обнаруживать и понимать звуки',
+            'термин | с разделителем',
+            'Методы сжатия данных - ',
+        ]
+
+    def test_normalize_mystem_batch(self):
+        self.assertEqual([normalize_mystem(phrase) for phrase in self._phrases],
+                         normalize_mystem_batch(self._phrases))
+
+    def test_batch_cache(self):
+        phrases = ['сжатие данных', 'методы сжатия', 'сжатие данных']
+        expected = [normalize_mystem(phrase) for phrase in phrases]
+        self.assertEqual(expected, normalize_mystem_batch(phrases))
+        # повторные фразы не отправляются в Mystem
+        with mock.patch.object(morph, 'analyze', wraps=morph.analyze) as analyze:
+            self.assertEqual(expected, normalize_mystem_batch(phrases))
+            analyze.assert_not_called()
+            self.assertEqual(expected + [normalize_mystem('сетевые протоколы')],
+                             normalize_mystem_batch(phrases + ['сетевые протоколы']))
+            analyze.assert_called_once_with('сетевые протоколы')
+
+    def test_mystem_pool(self):
+        pool = MystemPool(size=1)
+        self.assertEqual([normalize_mystem(phrase) for phrase in self._phrases], pool.normalize_batch(self._phrases))
+        self.assertEqual(normalize_mystem(self._phrases[0]), pool.normalize(self._phrases[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from utils.token_trie import TokenTrie, CompiledTokenTrie
+
+
+class TestTokenTrie(unittest.TestCase):
+
+    def setUp(self):
+        self._trie = TokenTrie()
+        self._trie.add(['метод'], 0)
+        self._trie.add(['метод', 'сжатие'], 1)
+        self._trie.add(['метод', 'сжатие', 'данные'], 2)
+        self._trie.add(['сжатие', 'данные'], 3)
+        self._trie.add(['данные'], 4)
+
+    def test_search_longest(self):
+        tokens = ['новый', 'метод', 'сжатие', 'данные', 'и', 'данные']
+        self.assertEqual([(1, 4, 2), (5, 6, 4)], self._trie.search_longest(tokens))
+
+    def test_search_longest_prefers_leftmost(self):
+        tokens = ['метод', 'сжатие', 'изображение']
+        self.assertEqual([(0, 2, 1)], self._trie.search_longest(tokens))
+
+    def test_search_all(self):
+        tokens = ['сжатие', 'данные']
+        self.assertEqual([(0, 2, 3), (1, 2, 4)], self._trie.search_all(tokens))
+
+    def test_token_boundaries(self):
+        self.assertEqual([], self._trie.search_all(['методы', 'сжатия']))
+
+    def test_duplicate_keeps_first_value(self):
+        self._trie.add(['данные'], 10)
+        self.assertEqual([(0, 1, 4)], self._trie.search_longest(['данные']))
+        self.assertEqual(5, len(self._trie))
+
+    def test_compiled_trie(self):
+        tokens = ['новый', 'метод', 'сжатие', 'данные', 'и', 'данные', 'метод']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'trie.idx')
+            self._trie.save(path, b'1' * 32)
+            compiled_trie = CompiledTokenTrie(path)
+            self.assertEqual(b'1' * 32, compiled_trie.checksum)
+            self.assertEqual(self._trie.search_longest(tokens), compiled_trie.search_longest(tokens))
+            self.assertEqual(self._trie.search_all(tokens), compiled_trie.search_all(tokens))
+            del compiled_trie
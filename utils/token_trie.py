@@ -0,0 +1,226 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+NO_VALUE = -1
+
+_MAGIC = b'TKTR'
+_FORMAT_VERSION = 1
+# магическая строка, версия формата, порядок байт, контрольная сумма источников, размеры секций
+_HEADER = struct.Struct('<4sIB32sIIII')
+
+
+class BaseTokenTrie:
+    """ Префиксное дерево над последовательностями токенов (n-граммами).
+
+    Каждой добавленной n-грамме сопоставляется целочисленный идентификатор. Поиск идёт по списку токенов, а не по
+    строке, поэтому совпадения всегда выровнены по границам токенов.
+    """
+
+    def search_longest(self, tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """ Ищет непересекающиеся вхождения n-грамм по правилу "самое левое, самое длинное" за один проход
+
+        :param tokens: Список токенов
+        :return: Отсортированный список кортежей (начало, конец (не включительно), идентификатор)
+        """
+        tokens = self._encode(tokens)
+        matches = []
+        i = 0
+        n_tokens = len(tokens)
+        while i < n_tokens:
+            match_end, match_value = self._longest_match(tokens, i)
+            if match_value == NO_VALUE:
+                i += 1
+            else:
+                matches.append((i, match_end, match_value))
+                i = match_end
+        return matches
+
+    def search_all(self, tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """ Ищет все (в том числе пересекающиеся) вхождения n-грамм
+
+        :param tokens: Список токенов
+        :return: Список кортежей (начало, конец (не включительно), идентификатор), отсортированный по началу и длине
+        """
+        tokens = self._encode(tokens)
+        matches = []
+        for start in range(len(tokens)):
+            node = 0
+            for end in range(start, len(tokens)):
+                node = self._step(node, tokens[end])
+                if node == NO_VALUE:
+                    break
+                value = self._value(node)
+                if value != NO_VALUE:
+                    matches.append((start, end + 1, value))
+        return matches
+
+    def _longest_match(self, tokens: Sequence[str], start: int) -> Tuple[int, int]:
+        match_end, match_value = start, NO_VALUE
+        node = 0
+        for end in range(start, len(tokens)):
+            node = self._step(node, tokens[end])
+            if node == NO_VALUE:
+                break
+            value = self._value(node)
+            if value != NO_VALUE:
+                match_end, match_value = end + 1, value
+        return match_end, match_value
+
+    def _encode(self, tokens: Sequence[str]) -> Sequence:
+        return tokens
+
+    def _step(self, node: int, token) -> int:
+        raise NotImplementedError
+
+    def _value(self, node: int) -> int:
+        raise NotImplementedError
+
+
+class TokenTrie(BaseTokenTrie):
+    """ Изменяемое префиксное дерево, которое строится в памяти и может быть сохранено в бинарный индекс """
+
+    def __init__(self):
+        self._children: List[Dict[str, int]] = [dict()]
+        self._values: List[int] = [NO_VALUE]
+
+    def add(self, key: Sequence[str], value: int):
+        """ Добавляет n-грамму в дерево. Если n-грамма уже есть, сохраняется первый идентификатор
+
+        :param key: n-грамма (список токенов)
+        :param value: неотрицательный идентификатор n-граммы
+        """
+        node = 0
+        for token in key:
+            child = self._children[node].get(token)
+            if child is None:
+                child = len(self._children)
+                self._children[node][token] = child
+                self._children.append(dict())
+                self._values.append(NO_VALUE)
+            node = child
+        if node != 0 and self._values[node] == NO_VALUE:
+            self._values[node] = value
+
+    def save(self, path: str, checksum: bytes):
+        """ Сохраняет дерево в компактный бинарный индекс, который загружается через mmap (см. CompiledTokenTrie).
+        Файл записывается атомарно, поэтому параллельно запущенные процессы не увидят его частично записанным
+
+        :param path: Путь к файлу индекса
+        :param checksum: Контрольная сумма источников, из которых построено дерево (32 байта)
+        """
+        vocab = sorted({token for children in self._children for token in children}, key=lambda t: t.encode('utf-8'))
+        token2id = {token: i for i, token in enumerate(vocab)}
+
+        vocab_offsets = array('I', [0])
+        vocab_blob = bytearray()
+        for token in vocab:
+            vocab_blob.extend(token.encode('utf-8'))
+            vocab_offsets.append(len(vocab_blob))
+        vocab_blob.extend(b'\0' * (-len(vocab_blob) % 4))
+
+        edge_starts = array('i', [0])
+        edge_tokens = array('i')
+        edge_children = array('i')
+        for children in self._children:
+            for token_id, child in sorted((token2id[token], child) for token, child in children.items()):
+                edge_tokens.append(token_id)
+                edge_children.append(child)
+            edge_starts.append(len(edge_tokens))
+
+        header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, sys.byteorder == 'little', checksum, len(vocab),
+                              len(vocab_blob), len(self._children), len(edge_tokens))
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(b'\0' * (-len(header) % 4))
+            for section in (vocab_offsets, vocab_blob, edge_starts, array('i', self._values), edge_tokens,
+                            edge_children):
+                f.write(section)
+        os.replace(tmp_path, path)
+
+    def _step(self, node: int, token: str) -> int:
+        return self._children[node].get(token, NO_VALUE)
+
+    def _value(self, node: int) -> int:
+        return self._values[node]
+
+    def __len__(self) -> int:
+        return sum(value != NO_VALUE for value in self._values)
+
+
+class CompiledTokenTrie(BaseTokenTrie):
+    """ Префиксное дерево, загруженное из бинарного индекса через mmap. Данные не копируются в память процесса, а
+    страницы файла разделяются всеми процессами, которые его открыли
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу индекса, созданному TokenTrie.save
+        """
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f'Token trie index {path} is truncated')
+        magic, version, is_little, checksum, n_vocab, blob_size, n_nodes, n_edges = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _FORMAT_VERSION or is_little != (sys.byteorder == 'little'):
+            raise ValueError(f'Token trie index {path} has incompatible format')
+        self.checksum = checksum
+
+        buffer = memoryview(self._mmap)
+        offset = _HEADER.size + (-_HEADER.size % 4)
+        sections = []
+        for size, item_size in ((n_vocab + 1, 4), (blob_size, 1), (n_nodes + 1, 4), (n_nodes, 4), (n_edges, 4),
+                                (n_edges, 4)):
+            sections.append(buffer[offset: offset + size * item_size])
+            offset += size * item_size
+        if offset != len(self._mmap):
+            raise ValueError(f'Token trie index {path} is truncated')
+        self._vocab_offsets = sections[0].cast('I')
+        self._vocab_blob = sections[1]
+        self._edge_starts = sections[2].cast('i')
+        self._values = sections[3].cast('i')
+        self._edge_tokens = sections[4].cast('i')
+        self._edge_children = sections[5].cast('i')
+
+    def _encode(self, tokens: Sequence[str]) -> List[int]:
+        return [self._token_id(token) for token in tokens]
+
+    def _token_id(self, token: str) -> int:
+        """ Бинарный поиск токена в отсортированном словаре индекса """
+        key = token.encode('utf-8')
+        low, high = 0, len(self._vocab_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._vocab_blob[self._vocab_offsets[middle]: self._vocab_offsets[middle + 1]].tobytes()
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return middle
+        return NO_VALUE
+
+    def _step(self, node: int, token_id: int) -> int:
+        if token_id == NO_VALUE:
+            return NO_VALUE
+        low, high = self._edge_starts[node], self._edge_starts[node + 1]
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._edge_tokens[middle]
+            if candidate < token_id:
+                low = middle + 1
+            elif candidate > token_id:
+                high = middle
+            else:
+                return self._edge_children[middle]
+        return NO_VALUE
+
+    def _value(self, node: int) -> int:
+        return self._values[node]
+
+    def __len__(self) -> int:
+        return sum(value != NO_VALUE for value in self._values)
@@ -29,6 +29,27 @@ def validate_sequence(seq: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
     return validated_seq
 
 
+def get_term_spans(seq: List[Tuple[str, str]]) -> List[Tuple[int, int]]:
+    """ Переводит последовательность тэгов в спаны терминов
+
+    :param seq: последовательность кортежей (Токен, Тэг)
+    :return: список спанов (начало, конец (не включительно))
+    """
+    spans = []
+    start = None
+    for i, (_, tag) in enumerate(seq):
+        if tag == Tags.B_TERM.value or (tag == Tags.I_TERM.value and start is None):
+            if start is not None:
+                spans.append((start, i))
+            start = i
+        elif tag != Tags.I_TERM.value and start is not None:
+            spans.append((start, i))
+            start = None
+    if start is not None:
+        spans.append((start, len(seq)))
+    return spans
+
+
 def tokenize(text: str) -> List[str]:
     puncts = {'(', ')', ':', ';', ',', '.', '"', '»', '«', '[', ']', '{', '}', '%'}
 